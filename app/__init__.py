@@ -4,18 +4,74 @@ HomeFeed - Flask Application Factory.
 
 import os
 import json
+import importlib
 from flask import Flask, session, redirect, url_for, request, jsonify
 from flask_compress import Compress
 from flask_session import Session
 
+try:
+    import orjson
+    from flask.json.provider import JSONProvider, DefaultJSONProvider
+except ImportError:
+    # orjson is optional - Flask's stdlib json provider is used without it
+    orjson = None
+
+
+if orjson is not None:
+    class ORJSONProvider(JSONProvider):
+        """Flask JSON provider backed by orjson.
+        
+        Used for jsonify() responses and request.get_json() parsing.
+        Keys are sorted and non-string keys allowed to match Flask's default
+        provider output (EXIF GPS data can have integer tag keys).
+        """
+        
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option).decode()
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+        
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.option)
+            return self._app.response_class(body, mimetype='application/json')
+
+
+# Blueprints registered by create_app, as (module, attribute) pairs.
+# Modules are imported by name so route code is only loaded when an app is built.
+_BLUEPRINTS = (
+    ('app.routes.images', 'images_bp'),
+    ('app.routes.folders', 'folders_bp'),
+    ('app.routes.favorites', 'favorites_bp'),
+    ('app.routes.trash', 'trash_bp'),
+    ('app.routes.cache', 'cache_bp'),
+    ('app.routes.pages', 'pages_bp'),
+    ('app.routes.auth', 'auth_bp'),
+)
+
+
+# Set once _ensure_config_files_exist() has run in this process
+_CONFIG_ENSURED = False
+
+# Set once _initialize_caches() has run in this process
+_CACHES_INITIALIZED = False
+
 
 def _ensure_config_files_exist():
     """Create default config files if they don't exist.
     
     This allows users to skip the manual setup step of copying example files.
     Files are created with sensible defaults on first launch.
+    Only checks once per process, so repeated create_app() calls are cheap.
     """
-    from app.config import CONFIG_FILE, FAVORITES_FILE, TRASH_FILE, DEFAULT_OPTIMIZATIONS
+    global _CONFIG_ENSURED
+    if _CONFIG_ENSURED:
+        return
+    
+    from app.config import CONFIG_FILE, DEFAULT_OPTIMIZATIONS
     
     defaults = {
         CONFIG_FILE: {
@@ -23,14 +79,40 @@ def _ensure_config_files_exist():
             'shuffle': False,
             'optimizations': DEFAULT_OPTIMIZATIONS
         },
-        FAVORITES_FILE: {'favorites': []},
-        TRASH_FILE: {'trash': []}
     }
     
     for filepath, default_content in defaults.items():
-        if not os.path.exists(filepath):
-            with open(filepath, 'w') as f:
-                json.dump(default_content, f, indent=2)
+        if not os.path.isfile(filepath):
+            if orjson is not None:
+                with open(filepath, 'wb') as f:
+                    f.write(orjson.dumps(default_content, option=orjson.OPT_INDENT_2))
+            else:
+                with open(filepath, 'w') as f:
+                    json.dump(default_content, f, indent=2)
+    
+    _CONFIG_ENSURED = True
+
+
+def _initialize_caches():
+    """Prepare the on-disk data stores once per process.
+    
+    Favorites and trash are append-only logs (created on first write);
+    they are compacted, migrating legacy favorites.json/trash.json. The
+    previous process's folder scan is loaded so the first request after a
+    restart doesn't walk every configured folder.
+    """
+    global _CACHES_INITIALIZED
+    if _CACHES_INITIALIZED:
+        return
+    
+    from app.services.data import compact_favorites, compact_trash
+    from app.services.image_cache import load_persisted_cache
+    
+    compact_favorites()
+    compact_trash()
+    load_persisted_cache()
+    
+    _CACHES_INITIALIZED = True
 
 
 def create_app(config=None):
@@ -45,6 +127,9 @@ def create_app(config=None):
     # Auto-create config files if they don't exist
     _ensure_config_files_exist()
     
+    # Compact the data logs and restore the last folder scan
+    _initialize_caches()
+    
     # Get the project root directory (where server.py is located)
     # __file__ is app/__init__.py, so parent is project root
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -54,6 +139,10 @@ def create_app(config=None):
                 static_folder=static_folder,
                 static_url_path='/static')
     
+    # Use orjson for jsonify() and request parsing when available
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
+    
     # Load configuration
     if config:
         app.config.update(config)
@@ -65,28 +154,27 @@ def create_app(config=None):
     app.config['SESSION_FILE_DIR'] = os.path.join(project_root, '.flask_session')
     Session(app)
     
-    # Enable Gzip compression for API responses
-    # Compresses JSON responses > 500 bytes, achieving 70-80% size reduction
-    app.config['COMPRESS_MIN_SIZE'] = 500  # Only compress responses > 500 bytes
-    app.config['COMPRESS_LEVEL'] = 6       # Balance between speed and compression
+    # Enable compression for API responses and text assets
+    # Small JSON responses (/api/folders, /api/settings, counts) cost more CPU
+    # to compress than they save, so only bodies > 2 KB are compressed - mostly
+    # the image URL lists from /api/images and /api/favorites/images.
+    # Flask-Compress negotiates br/zstd when the client supports them.
+    app.config['COMPRESS_MIN_SIZE'] = 2048  # Only compress responses > 2 KB
+    app.config['COMPRESS_LEVEL'] = 1        # gzip: fastest level, URL lists still compress well
+    app.config['COMPRESS_BR_LEVEL'] = 1     # brotli: same trade-off
+    app.config['COMPRESS_MIMETYPES'] = [
+        'application/json',
+        'text/html',
+        'text/css',
+        'text/javascript',
+        'application/javascript',
+    ]
     Compress(app)
     
     # Register blueprints
-    from app.routes.images import images_bp
-    from app.routes.folders import folders_bp
-    from app.routes.favorites import favorites_bp
-    from app.routes.trash import trash_bp
-    from app.routes.cache import cache_bp
-    from app.routes.pages import pages_bp
-    from app.routes.auth import auth_bp
-    
-    app.register_blueprint(images_bp)
-    app.register_blueprint(folders_bp)
-    app.register_blueprint(favorites_bp)
-    app.register_blueprint(trash_bp)
-    app.register_blueprint(cache_bp)
-    app.register_blueprint(pages_bp)
-    app.register_blueprint(auth_bp)
+    for module_name, blueprint_name in _BLUEPRINTS:
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, blueprint_name))
     
     # Add authentication check before each request
     from app.services import is_auth_enabled, is_authenticated
@@ -3,21 +3,24 @@ Configuration constants and settings for LocalFeed.
 """
 
 import os
-from typing import Set, Dict, Any
+from typing import FrozenSet, Dict, Any, Tuple
 
 # Base directory for the application
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Data file paths
 CONFIG_FILE = os.path.join(BASE_DIR, 'config.json')
-FAVORITES_FILE = os.path.join(BASE_DIR, 'favorites.json')
-TRASH_FILE = os.path.join(BASE_DIR, 'trash.json')
+FAVORITES_FILE = os.path.join(BASE_DIR, 'favorites.ndjson')  # Append-only log
+LEGACY_FAVORITES_FILE = os.path.join(BASE_DIR, 'favorites.json')  # Migrated on startup
+TRASH_FILE = os.path.join(BASE_DIR, 'trash.ndjson')  # Append-only log
+LEGACY_TRASH_FILE = os.path.join(BASE_DIR, 'trash.json')  # Migrated on startup
 THUMBNAIL_DIR = os.path.join(BASE_DIR, '.thumbnails')
+IMAGE_CACHE_FILE = os.path.join(BASE_DIR, '.image_cache.bin')  # Scan results kept across restarts
 
 # Supported file formats
-SUPPORTED_FORMATS: Set[str] = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.m4v', '.mp4', '.mov'}
-VIDEO_FORMATS: Set[str] = {'.m4v', '.mp4', '.mov', '.webm'}
-GIF_FORMATS: Set[str] = {'.gif'}
+SUPPORTED_FORMATS: FrozenSet[str] = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.m4v', '.mp4', '.mov'})
+VIDEO_FORMATS: FrozenSet[str] = frozenset({'.m4v', '.mp4', '.mov', '.webm'})
+GIF_FORMATS: FrozenSet[str] = frozenset({'.gif'})
 
 # Size limits
 MAX_VIDEO_SIZE = 75 * 1024 * 1024  # 75 MB limit for videos
@@ -25,6 +28,13 @@ MAX_VIDEO_SIZE = 75 * 1024 * 1024  # 75 MB limit for videos
 # Thumbnail settings
 THUMBNAIL_MAX_SIZE = 1920  # Max width/height for thumbnails
 THUMBNAIL_QUALITY = 85  # WebP quality (0-100)
+AVIF_QUALITY = 50  # AVIF quality (0-100); visually close to WebP at THUMBNAIL_QUALITY
+AVIF_SPEED = 6  # AVIF encoder speed (0 = slowest/smallest, 10 = fastest)
+# Bump to invalidate cached thumbnails/posters when generation or layout changes
+# Version 2: Added EXIF orientation handling
+# Version 3: Sharded cache layout (THUMBNAIL_DIR/xx/<digest>.webp)
+# Version 4: 16-character base32 keys (THUMBNAIL_DIR/xx/<key>.webp)
+THUMBNAIL_CACHE_VERSION = 4
 
 # Image list cache settings
 CACHE_TTL = 30  # seconds
@@ -33,6 +43,7 @@ CACHE_TTL = 30  # seconds
 DEFAULT_OPTIMIZATIONS: Dict[str, Any] = {
     'thumbnail_cache': False,
     'video_poster_cache': False,
+    'avif_thumbnails': False,  # Serve AVIF thumbnails to browsers that accept them
     'fill_screen': False,
     'auto_advance': False,
     'auto_advance_delay': 3,
@@ -52,3 +63,11 @@ MIME_TYPES: Dict[str, str] = {
     '.webm': 'video/webm',
     '.mov': 'video/quicktime'
 }
+
+# Per-extension info for supported formats: ext -> (is_video, is_gif, mime_type)
+# Lets hot paths do a single dict lookup instead of several set/dict checks.
+# Extensions missing from this dict are not supported.
+EXT_INFO: Dict[str, Tuple[bool, bool, str]] = {
+    ext: (ext in VIDEO_FORMATS, ext in GIF_FORMATS, MIME_TYPES.get(ext, 'application/octet-stream'))
+    for ext in SUPPORTED_FORMATS
+}
@@ -1,22 +1,29 @@
 """
 Routes module for LocalFeed.
 Contains all Flask blueprints for API endpoints.
+
+Blueprints are resolved lazily on attribute access, so importing a single
+route module (e.g. app.routes.images) doesn't pull in every other one.
 """
 
-from app.routes.images import images_bp
-from app.routes.folders import folders_bp
-from app.routes.favorites import favorites_bp
-from app.routes.trash import trash_bp
-from app.routes.cache import cache_bp
-from app.routes.pages import pages_bp
-from app.routes.auth import auth_bp
+import importlib
+
+# Blueprint name -> module that defines it
+_BLUEPRINT_MODULES = {
+    'images_bp': 'app.routes.images',
+    'folders_bp': 'app.routes.folders',
+    'favorites_bp': 'app.routes.favorites',
+    'trash_bp': 'app.routes.trash',
+    'cache_bp': 'app.routes.cache',
+    'pages_bp': 'app.routes.pages',
+    'auth_bp': 'app.routes.auth',
+}
+
+__all__ = list(_BLUEPRINT_MODULES)
+
 
-__all__ = [
-    'images_bp',
-    'folders_bp',
-    'favorites_bp',
-    'trash_bp',
-    'cache_bp',
-    'pages_bp',
-    'auth_bp',
-]
+def __getattr__(name):
+    module_name = _BLUEPRINT_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name), name)
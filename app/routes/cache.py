@@ -4,6 +4,7 @@ Handles cache management and application settings.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, request, jsonify
 
 from app.config import (
@@ -15,26 +16,183 @@ from app.services.data import (
     save_config,
     get_optimization_settings,
     save_optimization_settings,
+    get_config_version,
 )
+from app.services.json_response import cached_json_response
 
 
 cache_bp = Blueprint('cache', __name__)
 
 
+# os.fwalk() (POSIX only) yields an open fd per directory, so per-file stat/unlink
+# calls resolve names relative to it instead of re-walking the full path
+_USE_FWALK = hasattr(os, 'fwalk') and {os.stat, os.unlink} <= os.supports_dir_fd
+
+# Cache scans/deletes are syscall-bound and release the GIL, so they are fanned
+# out across a small thread pool: one task per top-level subdirectory plus
+# batches of top-level files
+_CACHE_WORKERS = 8
+_FILE_BATCH_SIZE = 512
+
+
+def _scandir_recursive(path):
+    """Yield file DirEntry objects under path, recursing into subdirectories.
+    
+    DirEntry caches type information from the directory read, so this avoids
+    the extra stat() per file that os.walk() + os.path.getsize() incurs.
+    Used where os.fwalk() is unavailable (Windows).
+    """
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _scandir_recursive(entry.path)
+                else:
+                    yield entry
+            except OSError:
+                pass
+
+
+def _get_tree_size(path):
+    """Count files under path and sum their sizes.
+    
+    Returns:
+        tuple: (file_count, total_size_bytes)
+    """
+    file_count = 0
+    total_size = 0
+    
+    if _USE_FWALK:
+        for _, _, filenames, dirfd in os.fwalk(path):
+            for name in filenames:
+                try:
+                    file_count += 1
+                    total_size += os.stat(name, dir_fd=dirfd, follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    else:
+        for entry in _scandir_recursive(path):
+            try:
+                file_count += 1
+                total_size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+    
+    return file_count, total_size
+
+
+def _delete_tree_files(path):
+    """Delete all files under path, leaving the directories in place.
+    
+    Returns:
+        tuple: (deleted_count, errors) where errors is a list of dicts
+    """
+    deleted_count = 0
+    errors = []
+    
+    if _USE_FWALK:
+        for _, _, filenames, dirfd in os.fwalk(path):
+            for name in filenames:
+                try:
+                    os.unlink(name, dir_fd=dirfd)
+                    deleted_count += 1
+                except Exception as e:
+                    errors.append({'file': name, 'error': str(e)})
+    else:
+        for entry in _scandir_recursive(path):
+            try:
+                os.remove(entry.path)
+                deleted_count += 1
+            except Exception as e:
+                errors.append({'file': entry.name, 'error': str(e)})
+    
+    return deleted_count, errors
+
+
+def _get_entries_size(entries):
+    """Count and sum sizes for a batch of file DirEntry objects."""
+    file_count = 0
+    total_size = 0
+    for entry in entries:
+        try:
+            file_count += 1
+            total_size += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            pass
+    return file_count, total_size
+
+
+def _delete_entries(entries):
+    """Delete a batch of file DirEntry objects."""
+    deleted_count = 0
+    errors = []
+    for entry in entries:
+        try:
+            os.remove(entry.path)
+            deleted_count += 1
+        except Exception as e:
+            errors.append({'file': entry.name, 'error': str(e)})
+    return deleted_count, errors
+
+
+def _run_parallel(path, tree_func, entries_func):
+    """Apply tree_func to each subdirectory and entries_func to batches of files.
+    
+    Work is split at the top level of path and run on a thread pool.
+    
+    Returns:
+        List of per-task results
+    """
+    files = []
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    files.append(entry)
+            except OSError:
+                pass
+    
+    batches = [files[i:i + _FILE_BATCH_SIZE] for i in range(0, len(files), _FILE_BATCH_SIZE)]
+    task_count = len(subdirs) + len(batches)
+    if task_count == 0:
+        return []
+    if task_count == 1:
+        return [tree_func(subdirs[0])] if subdirs else [entries_func(batches[0])]
+    
+    with ThreadPoolExecutor(max_workers=min(_CACHE_WORKERS, task_count)) as pool:
+        futures = [pool.submit(tree_func, d) for d in subdirs]
+        futures += [pool.submit(entries_func, b) for b in batches]
+        return [f.result() for f in futures]
+
+
 @cache_bp.route('/api/settings', methods=['GET'])
 def get_settings():
-    """Get user settings."""
+    """Get user settings.
+    
+    The serialized settings are cached until config.json changes.
+    """
+    return cached_json_response('settings', get_config_version(), _build_settings)
+
+
+def _build_settings():
+    """Build the settings payload from the current config."""
     config = load_config()
-    return jsonify({
+    return {
         'shuffle': config.get('shuffle', False),
         'optimizations': get_optimization_settings()
-    })
+    }
 
 
 @cache_bp.route('/api/settings', methods=['POST'])
 def update_settings():
     """Update user settings."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
+    if not data:
+        return jsonify({'error': 'Settings are required'}), 400
+    
     config = load_config()
     
     if 'shuffle' in data:
@@ -69,13 +227,9 @@ def get_cache_info():
     cache_files = 0
     
     if os.path.exists(THUMBNAIL_DIR):
-        for root, dirs, files in os.walk(THUMBNAIL_DIR):
-            for f in files:
-                try:
-                    cache_files += 1
-                    cache_size += os.path.getsize(os.path.join(root, f))
-                except OSError:
-                    pass
+        for file_count, total_size in _run_parallel(THUMBNAIL_DIR, _get_tree_size, _get_entries_size):
+            cache_files += file_count
+            cache_size += total_size
     
     # Format size
     if cache_size < 1024:
@@ -99,13 +253,9 @@ def clear_cache():
     errors = []
     
     if os.path.exists(THUMBNAIL_DIR):
-        for root, dirs, files in os.walk(THUMBNAIL_DIR):
-            for f in files:
-                try:
-                    os.remove(os.path.join(root, f))
-                    deleted_count += 1
-                except Exception as e:
-                    errors.append({'file': f, 'error': str(e)})
+        for count, task_errors in _run_parallel(THUMBNAIL_DIR, _delete_tree_files, _delete_entries):
+            deleted_count += count
+            errors.extend(task_errors)
     
     return jsonify({
         'success': True,
@@ -3,23 +3,30 @@ Favorites management routes for LocalFeed.
 Handles adding, removing, and listing favorite images.
 """
 
-import os
-from urllib.parse import quote, unquote
+from operator import itemgetter
+from urllib.parse import unquote
 from flask import Blueprint, request, jsonify
 
 from app.services.data import (
     load_favorites,
-    save_favorites,
+    append_favorite,
+    append_favorite_removal,
     cleanup_favorites,
+    cleanup_favorites_with_mtimes,
+    get_favorites_in_folder,
+    stat_mtimes,
     load_trash,
     save_trash,
 )
 from app.services.path_utils import (
     normalize_path,
     is_path_allowed,
-    format_image_url,
+    format_image_urls,
+    format_versioned_image_urls,
     extract_path_from_url,
+    IMAGE_URL_PREFIX,
 )
+from app.services.json_response import stream_json_array
 
 
 favorites_bp = Blueprint('favorites', __name__)
@@ -30,14 +37,14 @@ def get_favorites():
     """Get list of favorited image paths (as URL paths for frontend compatibility)."""
     favorites = cleanup_favorites()
     # Convert to URL format for frontend (URL-encoded for Windows paths)
-    favorite_urls = [f'/image?path={quote(img, safe="")}' for img in favorites]
+    favorite_urls = list(format_image_urls(favorites, prefix=IMAGE_URL_PREFIX))
     return jsonify({'favorites': favorite_urls})
 
 
 @favorites_bp.route('/api/favorites', methods=['POST'])
 def add_favorite():
     """Add image to favorites."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     path = data.get('path', '').strip()
     
     if not path:
@@ -48,17 +55,16 @@ def add_favorite():
     
     favorites = load_favorites()
     
-    if path not in favorites:
-        favorites.append(path)
-        save_favorites(favorites)
+    if favorites.add(path):
+        append_favorite(path)
     
-    return jsonify({'success': True, 'favorites': favorites})
+    return jsonify({'success': True, 'favorites': favorites.to_list()})
 
 
 @favorites_bp.route('/api/favorites', methods=['DELETE'])
 def remove_favorite():
     """Remove image from favorites."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     path = data.get('path', '').strip()
     
     if not path:
@@ -69,23 +75,22 @@ def remove_favorite():
     
     favorites = load_favorites()
     
-    if path in favorites:
-        favorites.remove(path)
-        save_favorites(favorites)
+    if favorites.remove(path):
+        append_favorite_removal(path)
     
-    return jsonify({'success': True, 'favorites': favorites})
+    return jsonify({'success': True, 'favorites': favorites.to_list()})
 
 
 @favorites_bp.route('/api/favorites/images', methods=['GET'])
 def get_favorite_images():
     """Get favorited images as URLs (filtered to existing files only)."""
     sort_order = request.args.get('sort', 'newest')
-    favorites = cleanup_favorites()
-    # Sort by modification time
-    favorites.sort(key=lambda x: os.path.getmtime(x) if os.path.exists(x) else 0, reverse=(sort_order == 'newest'))
-    # URL-encode paths for Windows compatibility
-    image_urls = [format_image_url(img) for img in favorites]
-    return jsonify(image_urls)
+    entries = cleanup_favorites_with_mtimes()
+    # Sort by modification time (collected during cleanup, no re-stat)
+    entries.sort(key=itemgetter(1), reverse=(sort_order == 'newest'))
+    # URL-encode paths for Windows compatibility, streaming the (possibly
+    # very long) array instead of building the full list and JSON string
+    return stream_json_array(format_versioned_image_urls(entries))
 
 
 @favorites_bp.route('/api/favorites/images/folder', methods=['GET'])
@@ -104,15 +109,14 @@ def get_favorite_images_by_folder():
     if not is_path_allowed(folder_path):
         return jsonify({'error': 'Access denied'}), 403
     
-    # Get favorites and filter by folder
-    favorites = cleanup_favorites()
-    filtered = [img for img in favorites if os.path.dirname(img) == folder_path]
+    # Get favorites in this folder (indexed lookup), dropping missing files
+    filtered = stat_mtimes(get_favorites_in_folder(folder_path))
     
     # Sort by modification time
-    filtered.sort(key=lambda x: os.path.getmtime(x) if os.path.exists(x) else 0, reverse=(sort_order == 'newest'))
+    filtered.sort(key=itemgetter(1), reverse=(sort_order == 'newest'))
     
     # Return as URLs
-    image_urls = [format_image_url(img) for img in filtered]
+    image_urls = list(format_versioned_image_urls(filtered))
     return jsonify(image_urls)
 
 
@@ -7,9 +7,10 @@ import os
 from urllib.parse import unquote
 from flask import Blueprint, request, jsonify
 
-from app.services.data import load_config, save_config
+from app.services.data import load_config, save_config, get_config_version, get_folder_set
+from app.services.json_response import cached_json_response
 from app.services.path_utils import normalize_path, expand_path, is_path_allowed
-from app.services.image_cache import get_leaf_folders, invalidate_cache
+from app.services.image_cache import get_leaf_folders, invalidate_folder
 
 
 folders_bp = Blueprint('folders', __name__)
@@ -17,9 +18,15 @@ folders_bp = Blueprint('folders', __name__)
 
 @folders_bp.route('/api/folders', methods=['GET'])
 def get_folders():
-    """Get list of configured folders."""
-    config = load_config()
-    return jsonify(config.get('folders', []))
+    """Get list of configured folders.
+    
+    The serialized list is cached until config.json changes.
+    """
+    return cached_json_response(
+        'folders',
+        get_config_version(),
+        lambda: load_config().get('folders', [])
+    )
 
 
 @folders_bp.route('/api/folders/leaf', methods=['GET'])
@@ -37,7 +44,7 @@ def get_leaf_folders_route():
 @folders_bp.route('/api/folders', methods=['POST'])
 def add_folder():
     """Add a new folder to the configuration."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     path = data.get('path', '').strip()
     
     if not path:
@@ -49,21 +56,20 @@ def add_folder():
     if not os.path.isdir(expanded_path):
         return jsonify({'error': f'Folder not found: {expanded_path}'}), 400
     
-    config = load_config()
-    folders = config.get('folders', [])
-    
     # Normalize path for storage (use expanded path)
     normalized = os.path.normpath(expanded_path)
     
-    if normalized in folders:
+    if normalized in get_folder_set():
         return jsonify({'error': 'Folder already added'}), 400
     
+    config = load_config()
+    folders = config.get('folders', [])
     folders.append(normalized)
     config['folders'] = folders
     save_config(config)
     
-    # Invalidate cache since folders changed
-    invalidate_cache()
+    # Only the new folder needs scanning; other folders stay cached
+    invalidate_folder(normalized)
     
     return jsonify({'success': True, 'folders': folders})
 
@@ -71,24 +77,24 @@ def add_folder():
 @folders_bp.route('/api/folders', methods=['DELETE'])
 def remove_folder():
     """Remove a folder from the configuration."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     path = data.get('path', '').strip()
     
     if not path:
         return jsonify({'error': 'Path is required'}), 400
     
+    # Normalize the path to match stored format
+    normalized = normalize_path(path)
+    
     config = load_config()
     folders = config.get('folders', [])
     
-    # Normalize the path to match stored format
-    normalized = os.path.normpath(expand_path(path))
-    
     if normalized in folders:
         folders.remove(normalized)
         config['folders'] = folders
         save_config(config)
         
-        # Invalidate cache since folders changed
-        invalidate_cache()
+        # Drop only the removed folder's cached images
+        invalidate_folder(normalized)
     
     return jsonify({'success': True, 'folders': folders})
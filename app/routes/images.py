@@ -7,58 +7,115 @@ import os
 import time
 import hashlib
 import logging
-from pathlib import Path
+from functools import lru_cache
 from urllib.parse import unquote
-from flask import Blueprint, request, jsonify, make_response, send_file
+from flask import Blueprint, current_app, request, jsonify, make_response, send_file
 
 logger = logging.getLogger(__name__)
 
+try:
+    import imagesize
+except ImportError:
+    # imagesize is optional - dimensions fall back to PIL
+    imagesize = None
+
 from app.config import (
     MIME_TYPES,
     VIDEO_FORMATS,
     GIF_FORMATS,
     THUMBNAIL_DIR,
+    THUMBNAIL_CACHE_VERSION,
 )
 from app.services.path_utils import (
     normalize_path,
+    get_extension,
     is_path_allowed,
     validate_and_normalize_path,
-    format_image_url,
+    format_versioned_image_urls,
+    get_image_url_prefix,
+)
+from app.services.image_cache import (
+    get_all_images,
+    get_image_mtimes,
+    get_folder_entries,
+    get_image_cache_version,
 )
-from app.services.image_cache import get_all_images, get_images_by_folder
 from app.services.optimizations import (
     ensure_thumbnail_dir,
+    avif_supported,
     get_thumbnail_path,
-    create_thumbnail,
-    create_video_poster,
+    get_avif_thumbnail_path,
+    generate_thumbnail,
+    generate_video_poster,
 )
-from app.services.data import get_optimization_settings
+from app.services.data import get_folder_list, get_optimization_settings_view
+from app.services.fast_stat import fast_stat
+from app.services.json_response import dumps_bytes, dumps_url_list, cached_json_response
 
 
 images_bp = Blueprint('images', __name__)
 
+# EXIF tags shown in the metadata panel, looked up directly by numeric ID
+# Main image IFD (IFD0)
+_EXIF_IFD0_TAGS = {
+    0x010F: 'Make',
+    0x0110: 'Model',
+    0x0112: 'Orientation',
+    0x011A: 'XResolution',
+    0x011B: 'YResolution',
+    0x0131: 'Software',
+    0x0132: 'DateTime',
+}
+# Exif sub-IFD (camera settings)
+_EXIF_SUBIFD_TAGS = {
+    0x829A: 'ExposureTime',
+    0x829D: 'FNumber',
+    0x8827: 'ISOSpeedRatings',
+    0x9003: 'DateTimeOriginal',
+    0x920A: 'FocalLength',
+    0xA434: 'LensModel',
+}
+# IFD pointer tags (same values as PIL.ExifTags.IFD.Exif / IFD.GPSInfo)
+_EXIF_SUBIFD_POINTER = 0x8769
+_GPS_IFD_POINTER = 0x8825
+
+# Formats /thumbnail serves as the original file (GIFs stay animated,
+# videos are handled separately)
+_ORIGINAL_ONLY_FORMATS = GIF_FORMATS | VIDEO_FORMATS
+
 
 @images_bp.route('/api/images', methods=['GET'])
 def get_images():
-    """Get list of all images from configured folders."""
-    sort_order = request.args.get('sort', 'newest')
-    images = get_all_images()
-    
-    # Sort images if needed
-    if sort_order == 'oldest':
-        # Reverse the order (oldest first)
-        images = images[::-1]
+    """Get list of all images from configured folders.
     
-    # Return relative URLs for the images (URL-encoded for Windows paths)
-    image_urls = [format_image_url(img) for img in images]
-    return jsonify(image_urls)
+    The serialized URL list is cached until the image list is rebuilt.
+    """
+    # Anything but 'oldest' means newest first; keeps cache keys bounded
+    sort_order = 'oldest' if request.args.get('sort') == 'oldest' else 'newest'
+    images = get_all_images()
+    mtimes = get_image_mtimes()
+    
+    def build():
+        entries = zip(images, mtimes)
+        # Sort images if needed
+        if sort_order == 'oldest':
+            # Reverse the order (oldest first) without copying the lists
+            entries = zip(reversed(images), reversed(mtimes))
+        # Return relative URLs for the images (URL-encoded for Windows paths,
+        # versioned by mtime), serialized straight from the URL generator
+        return dumps_url_list(format_versioned_image_urls(entries))
+    
+    # URLs depend on the thumbnail setting, so it is part of the version.
+    # The mtimes in them come from the same rebuild as the cache version
+    version = (get_image_cache_version(), get_image_url_prefix())
+    return cached_json_response(f'images:{sort_order}', version, build)
 
 
 @images_bp.route('/api/images/folder', methods=['GET'])
 def get_images_by_folder_route():
     """Get list of images from a specific folder."""
     folder_path = request.args.get('folder')
-    sort_order = request.args.get('sort', 'newest')
+    sort_order = 'oldest' if request.args.get('sort') == 'oldest' else 'newest'
     
     if not folder_path:
         return jsonify({'error': 'Folder parameter required'}), 400
@@ -70,97 +127,161 @@ def get_images_by_folder_route():
     if not is_path_allowed(folder_path):
         return jsonify({'error': 'Access denied'}), 403
     
-    # Get images filtered by folder
-    filtered_images = get_images_by_folder(folder_path)
+    # Refresh the image list so the cache version is current. Folders
+    # without images in it get an uncached empty list, so arbitrary
+    # subpaths can't each add a cache entry
+    if not get_folder_entries(folder_path)[0]:
+        return current_app.response_class(b'[]', mimetype='application/json')
     
-    # Sort images if needed
-    if sort_order == 'oldest':
-        # Reverse the order (oldest first)
-        filtered_images = filtered_images[::-1]
+    def build():
+        # Get images filtered by folder, with mtimes from the same snapshot
+        paths, mtimes = get_folder_entries(folder_path)
+        entries = zip(paths, mtimes)
+        
+        # Sort images if needed
+        if sort_order == 'oldest':
+            # Reverse the order (oldest first) without copying the lists
+            entries = zip(reversed(paths), reversed(mtimes))
+        
+        # Return as URLs versioned by mtime
+        return dumps_url_list(format_versioned_image_urls(entries))
     
-    # Return as URLs
-    image_urls = [format_image_url(img) for img in filtered_images]
-    return jsonify(image_urls)
+    version = (get_image_cache_version(), get_image_url_prefix())
+    return cached_json_response(f'images:{sort_order}:{folder_path}', version, build)
 
 
 @images_bp.route('/api/image-count', methods=['GET'])
 def get_image_count():
     """Get count of images and folders."""
-    from app.services.data import load_config
-    config = load_config()
     images = get_all_images()
     return jsonify({
         'imageCount': len(images),
-        'folderCount': len(config.get('folders', []))
+        'folderCount': len(get_folder_list())
     })
 
 
 @images_bp.route('/api/metadata', methods=['GET'])
 def get_image_metadata():
-    """Get metadata for an image including dimensions, dates, file size, etc."""
+    """Get metadata for an image including dimensions, dates, file size, etc.
+    
+    Pass exif=0 to skip EXIF extraction; dimensions are then read from the
+    file header only (via imagesize, if installed).
+    """
     image_path = request.args.get('path')
+    include_exif = request.args.get('exif', '1') != '0'
     
     # Validate and normalize path
     expanded_image, error = validate_and_normalize_path(image_path)
     if error:
         return jsonify(error[0]), error[1]
     
-    if not os.path.exists(expanded_image):
+    # Single stat: doubles as the existence check and the cache key
+    try:
+        file_stat = os.stat(expanded_image)
+    except OSError:
         return jsonify({'error': 'Image not found'}), 404
     
     try:
-        # Get file stats
-        file_stat = os.stat(expanded_image)
-        
-        # Format dates
-        from datetime import datetime
-        created_time = datetime.fromtimestamp(file_stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
-        modified_time = datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Get file size in human-readable format
-        size_bytes = file_stat.st_size
-        if size_bytes < 1024:
-            size_str = f"{size_bytes} B"
-        elif size_bytes < 1024 * 1024:
-            size_str = f"{size_bytes / 1024:.1f} KB"
-        elif size_bytes < 1024 * 1024 * 1024:
-            size_str = f"{size_bytes / (1024 * 1024):.1f} MB"
-        else:
-            size_str = f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
-        
-        # Get image dimensions and EXIF data using PIL
-        width = None
-        height = None
-        exif_data = {}
-        
+        body = _compute_metadata(
+            expanded_image,
+            file_stat.st_mtime_ns,
+            file_stat.st_ctime_ns,
+            file_stat.st_size,
+            include_exif
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    return current_app.response_class(body, mimetype='application/json')
+
+
+@lru_cache(maxsize=4096)
+def _compute_metadata(
+    image_path: str,
+    mtime_ns: int,
+    ctime_ns: int,
+    size_bytes: int,
+    include_exif: bool = True
+) -> bytes:
+    """Build the serialized metadata JSON for an image.
+    
+    Memoized on the file's path, timestamps, and size, so repeat requests
+    skip the PIL decode and JSON encoding. A modified file gets a new key,
+    so stale entries are never served.
+    
+    Args:
+        image_path: Normalized path to the image
+        mtime_ns: File modification time in nanoseconds
+        ctime_ns: File creation/change time in nanoseconds
+        size_bytes: File size in bytes
+        include_exif: Whether to read EXIF tags (requires opening with PIL)
+    
+    Returns:
+        JSON-encoded metadata bytes
+    """
+    # Format dates
+    from datetime import datetime
+    created_time = datetime.fromtimestamp(ctime_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S')
+    modified_time = datetime.fromtimestamp(mtime_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S')
+    
+    # Get file size in human-readable format
+    if size_bytes < 1024:
+        size_str = f"{size_bytes} B"
+    elif size_bytes < 1024 * 1024:
+        size_str = f"{size_bytes / 1024:.1f} KB"
+    elif size_bytes < 1024 * 1024 * 1024:
+        size_str = f"{size_bytes / (1024 * 1024):.1f} MB"
+    else:
+        size_str = f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
+    
+    # Get image dimensions and EXIF data
+    width = None
+    height = None
+    exif_data = {}
+    
+    # Fast path: when EXIF isn't requested, read dimensions from the file
+    # header with imagesize instead of opening the image through PIL
+    if not include_exif and imagesize is not None:
+        try:
+            width, height = imagesize.get(image_path)
+        except Exception:
+            pass
+        if width is not None and width < 0:
+            # Format not supported by imagesize (e.g. HEIC) - use PIL below
+            width = height = None
+    
+    if width is None:
         try:
             from PIL import Image
-            from PIL.ExifTags import TAGS, GPSTAGS
+            from PIL.ExifTags import GPSTAGS
             
-            with Image.open(expanded_image) as img:
+            with Image.open(image_path) as img:
                 width, height = img.size
                 
-                # Try to get EXIF data
+                # Try to get EXIF data (skipped if not requested)
+                # Only the tags we display are looked up, so unwanted tags are
+                # never converted
                 try:
-                    exif = img._getexif()
+                    exif = img.getexif() if include_exif else None
                     if exif:
-                        for tag_id, value in exif.items():
-                            tag = TAGS.get(tag_id, tag_id)
-                            
-                            # Handle GPS data specially
-                            if tag == 'GPSInfo':
-                                gps_info = {}
-                                for gps_id in value:
-                                    gps_tag = GPSTAGS.get(gps_id, gps_id)
-                                    gps_info[gps_tag] = _convert_exif_value(value[gps_id])
-                                if gps_info:
-                                    exif_data['GPS'] = gps_info
-                            # Handle common EXIF tags we want to display
-                            elif tag in ['Make', 'Model', 'DateTime', 'DateTimeOriginal', 
-                                        'ExposureTime', 'FNumber', 'ISOSpeedRatings',
-                                        'FocalLength', 'LensModel', 'Software',
-                                        'Orientation', 'XResolution', 'YResolution']:
+                        for tag_id, tag in _EXIF_IFD0_TAGS.items():
+                            value = exif.get(tag_id)
+                            if value is not None:
                                 exif_data[tag] = _convert_exif_value(value)
+                        
+                        exif_ifd = exif.get_ifd(_EXIF_SUBIFD_POINTER)
+                        for tag_id, tag in _EXIF_SUBIFD_TAGS.items():
+                            value = exif_ifd.get(tag_id)
+                            if value is not None:
+                                exif_data[tag] = _convert_exif_value(value)
+                        
+                        # Handle GPS data specially
+                        gps_ifd = exif.get_ifd(_GPS_IFD_POINTER)
+                        if gps_ifd:
+                            exif_data['GPS'] = {
+                                GPSTAGS.get(gps_id, gps_id): _convert_exif_value(value)
+                                for gps_id, value in gps_ifd.items()
+                            }
                 except (AttributeError, KeyError, TypeError):
                     pass  # No EXIF data available
                 
@@ -170,36 +291,33 @@ def get_image_metadata():
         except Exception:
             # Could not read image dimensions
             pass
-        
-        # Get file extension
-        ext = Path(expanded_image).suffix.lower()
-        
-        # Calculate aspect ratio
-        aspect_ratio = None
-        if width and height:
-            from math import gcd
-            g = gcd(width, height)
-            aspect_ratio = f"{width // g}:{height // g}"
-        
-        metadata = {
-            'path': expanded_image,
-            'filename': os.path.basename(expanded_image),
-            'extension': ext,
-            'size_bytes': size_bytes,
-            'size_formatted': size_str,
-            'created': created_time,
-            'modified': modified_time,
-            'width': width,
-            'height': height,
-            'resolution': f"{width} × {height}" if width and height else None,
-            'aspect_ratio': aspect_ratio,
-            'exif': exif_data if exif_data else None
-        }
-        
-        return jsonify(metadata)
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Get file extension
+    ext = get_extension(image_path)
+    
+    # Calculate aspect ratio
+    aspect_ratio = None
+    if width and height:
+        from math import gcd
+        g = gcd(width, height)
+        aspect_ratio = f"{width // g}:{height // g}"
+    
+    metadata = {
+        'path': image_path,
+        'filename': os.path.basename(image_path),
+        'extension': ext,
+        'size_bytes': size_bytes,
+        'size_formatted': size_str,
+        'created': created_time,
+        'modified': modified_time,
+        'width': width,
+        'height': height,
+        'resolution': f"{width} × {height}" if width and height else None,
+        'aspect_ratio': aspect_ratio,
+        'exif': exif_data if exif_data else None
+    }
+    
+    return dumps_bytes(metadata)
 
 
 def _convert_exif_value(value):
@@ -235,56 +353,34 @@ def _convert_exif_value(value):
     return value
 
 
-def _parse_range_header(range_header, file_size):
-    """Parse HTTP Range header and return (start, end) tuple.
+@lru_cache(maxsize=8192)
+def _etag_hash(path: str, mtime: int, size: int) -> str:
+    """Compute an ETag value (unquoted) for a file version.
+    
+    Uses BLAKE2b with a 16-byte digest, which is faster than MD5 on short
+    inputs; ETags don't need a cryptographic hash. Memoized so repeat
+    requests for the same file version skip hashing entirely.
     
-    Supports formats:
-        bytes=0-1023        (explicit range)
-        bytes=0-            (from start to end)
-        bytes=-1023         (last 1023 bytes)
+    Args:
+        path: Normalized file path
+        mtime: File modification time (whole seconds)
+        size: File size in bytes
     
-    Returns (None, None) if invalid.
+    Returns:
+        32-character hex digest
     """
-    try:
-        # Remove 'bytes=' prefix
-        if not range_header.startswith('bytes='):
-            return None, None
-        
-        range_spec = range_header[6:].strip()
-        
-        # Handle multiple ranges (we only support single range)
-        # Just take the first range if multiple specified
-        if ',' in range_spec:
-            range_spec = range_spec.split(',')[0].strip()
-        
-        # Parse start and end
-        if range_spec.startswith('-'):
-            # Suffix range: last N bytes
-            suffix_length = int(range_spec[1:])
-            start = max(0, file_size - suffix_length)
-            end = file_size - 1
-        elif range_spec.endswith('-'):
-            # Open-ended range: from start to end of file
-            start = int(range_spec[:-1])
-            end = file_size - 1
-        else:
-            # Explicit range: start-end
-            parts = range_spec.split('-')
-            if len(parts) != 2:
-                return None, None
-            start = int(parts[0])
-            end = int(parts[1])
-        
-        # Validate range
-        if start < 0 or end < start or start >= file_size:
-            return None, None
-        
-        # Clamp end to file size
-        end = min(end, file_size - 1)
-        
-        return start, end
-    except (ValueError, IndexError):
-        return None, None
+    return hashlib.blake2b(f"{path}:{mtime}:{size}".encode(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=8192)
+def _versioned_thumbnail_etag(path: str, version: str) -> str:
+    """Compute the ETag value (unquoted) for a versioned thumbnail URL.
+    
+    Derived only from the request (path and v parameter) plus the thumbnail
+    cache version, so it can be checked without a stat.
+    """
+    key = f"{path}:v={version}:thumb:{THUMBNAIL_CACHE_VERSION}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
 
 
 @images_bp.route('/image')
@@ -307,75 +403,45 @@ def serve_image():
     if not is_path_allowed(expanded_image):
         return 'Access denied', 403
     
-    if not os.path.exists(expanded_image):
+    # Get file stats for caching (single stat also checks existence)
+    exists, file_size, file_mtime = fast_stat(expanded_image)
+    if not exists:
         return 'Image not found', 404
+    file_mtime = int(file_mtime)
     
     # Determine mime type
-    ext = Path(expanded_image).suffix.lower()
+    ext = get_extension(expanded_image)
     mime_type = MIME_TYPES.get(ext, 'application/octet-stream')
     
-    # Get file stats for caching
-    file_stat = os.stat(expanded_image)
-    file_mtime = int(file_stat.st_mtime)
-    file_size = file_stat.st_size
-    
     # Generate ETag based on path, mtime, and size
-    etag_hash = hashlib.md5(f"{expanded_image}:{file_mtime}:{file_size}".encode()).hexdigest()
+    etag_hash = _etag_hash(expanded_image, file_mtime, file_size)
     etag = f'"{etag_hash}"'
     
-    # For video files, handle Range requests for streaming
+    # For video files, let send_file handle Range requests for streaming.
+    # With conditional=True Werkzeug parses Range and returns 206 with
+    # Content-Range (or 416), streaming through wsgi.file_wrapper/sendfile
+    # instead of reading the requested chunk into memory.
     if ext in VIDEO_FORMATS:
-        range_header = request.headers.get('Range')
-        
-        if range_header:
-            # Parse the range request
-            start, end = _parse_range_header(range_header, file_size)
-            
-            if start is not None:
-                # Read only the requested chunk
-                with open(expanded_image, 'rb') as f:
-                    f.seek(start)
-                    data = f.read(end - start + 1)
-                
-                response = make_response(data)
-                response.status_code = 206  # Partial Content
-                response.headers['Content-Range'] = f'bytes {start}-{end}/{file_size}'
-                response.headers['Content-Length'] = len(data)
-                response.headers['Content-Type'] = mime_type
-                response.headers['Accept-Ranges'] = 'bytes'
-                response.headers['Cache-Control'] = 'public, max-age=604800'
-                response.headers['ETag'] = etag
-                response.headers['Last-Modified'] = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(file_mtime))
-                return response
-            else:
-                # Invalid range - return 416 error
-                response = make_response('Requested Range Not Satisfiable')
-                response.status_code = 416
-                response.headers['Content-Range'] = f'bytes */{file_size}'
-                return response
-        
-        # No Range header for video - still advertise support
-        response = make_response(send_file(expanded_image, mimetype=mime_type))
+        response = send_file(
+            expanded_image,
+            mimetype=mime_type,
+            conditional=True,
+            etag=etag_hash,
+            last_modified=file_mtime
+        )
         response.headers['Accept-Ranges'] = 'bytes'
         response.headers['Cache-Control'] = 'public, max-age=604800'
-        response.headers['ETag'] = etag
-        response.headers['Last-Modified'] = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(file_mtime))
         return response
     
     # Check If-None-Match header for 304 response (images only)
     if request.headers.get('If-None-Match') == etag:
         return '', 304
     
-    # Check If-Modified-Since header for 304 response (images only)
-    if_modified_since = request.headers.get('If-Modified-Since')
-    if if_modified_since:
-        try:
-            from email.utils import parsedate_to_datetime
-            header_time = int(parsedate_to_datetime(if_modified_since).timestamp())
-            if header_time >= file_mtime:
-                return '', 304
-        except (ValueError, TypeError):
-            pass
+    # Check If-Modified-Since header for 304 response (images only).
+    # Werkzeug parses the date (None if absent or malformed)
+    if_modified_since = request.if_modified_since
+    if if_modified_since is not None and int(if_modified_since.timestamp()) >= file_mtime:
+        return '', 304
     
     # Create response with caching headers (images)
     response = make_response(send_file(expanded_image, mimetype=mime_type))
@@ -388,6 +454,15 @@ def serve_image():
     return response
 
 
+def _accepts_avif() -> bool:
+    """Check whether the client explicitly lists image/avif in Accept.
+    
+    Wildcards (*/*, image/*) don't count: clients that send only those
+    may not decode AVIF, so they keep getting WebP.
+    """
+    return any(mimetype == 'image/avif' and quality > 0 for mimetype, quality in request.accept_mimetypes)
+
+
 @images_bp.route('/thumbnail')
 def serve_thumbnail():
     """Serve a resized WebP thumbnail for an image.
@@ -398,9 +473,12 @@ def serve_thumbnail():
     3. Caching thumbnails on disk for subsequent requests
     
     For a 20MB iPhone photo, this serves a ~300KB WebP instead.
+    
+    An optional v parameter (the source file's mtime) marks the URL as
+    versioned: conditional requests for it get a 304 without any stat.
     """
     # Check if thumbnail optimization is enabled
-    optimizations = get_optimization_settings()
+    optimizations = get_optimization_settings_view()
     if not optimizations.get('thumbnail_cache', False):
         # Optimization disabled - fall back to original image
         logger.debug("Thumbnail optimization disabled, serving original")
@@ -418,69 +496,85 @@ def serve_thumbnail():
     if not is_path_allowed(expanded_image):
         return 'Access denied', 403
     
-    if not os.path.exists(expanded_image):
-        return 'Image not found', 404
-    
     # Get file extension
-    ext = Path(expanded_image).suffix.lower()
+    ext = get_extension(expanded_image)
     
     # For GIFs and videos, fall back to original file
     # GIFs need to stay animated, videos are handled separately
-    if ext in GIF_FORMATS or ext in VIDEO_FORMATS:
+    if ext in _ORIGINAL_ONLY_FORMATS:
         # Redirect to original image endpoint
         logger.debug("Skipping %s file, serving original", ext)
         return serve_image()
     
-    # Get file stats for cache key and validation
-    try:
-        file_stat = os.stat(expanded_image)
-        file_mtime = int(file_stat.st_mtime)
-        file_size = file_stat.st_size
-    except OSError:
-        return 'Could not read file stats', 500
-    
-    # Generate ETag for the thumbnail (based on original file)
-    # Include cache version to match thumbnail path generation
-    CACHE_VERSION = 2
-    etag_hash = hashlib.md5(f"{expanded_image}:{file_mtime}:{file_size}:v{CACHE_VERSION}:thumb".encode()).hexdigest()
-    etag = f'"{etag_hash}"'
+    # AVIF variant for browsers that explicitly accept it (smaller than WebP).
+    # Responses then depend on Accept, so caches must key on it too
+    avif_enabled = optimizations.get('avif_thumbnails', False) and avif_supported()
+    use_avif = avif_enabled and _accepts_avif()
+    etag_suffix = '-avif' if use_avif else ''
+    vary_headers = {'Vary': 'Accept'} if avif_enabled else {}
+    
+    # Versioned URLs (&v=<source mtime>) name one immutable version of the
+    # thumbnail, so a conditional request is answered before touching disk
+    version = request.args.get('v')
+    if version:
+        etag = f'"{_versioned_thumbnail_etag(expanded_image, version)}{etag_suffix}"'
+        if request.headers.get('If-None-Match') == etag:
+            return '', 304, vary_headers
+    
+    # Get file stats for cache key and validation (single stat also checks existence)
+    exists, file_size, file_mtime = fast_stat(expanded_image)
+    if not exists:
+        return 'Image not found', 404
+    file_mtime = int(file_mtime)
+    
+    # A v from a listing built before the file changed doesn't describe the
+    # current content, so it must not label it; use the content's own ETag
+    if version and version != str(file_mtime):
+        version = None
+    
+    # Get thumbnail cache path. Its key is derived from the original file
+    # and cache version, so it doubles as the ETag (no extra hashing)
+    thumbnail_path, thumbnail_key = get_thumbnail_path(expanded_image, file_mtime, file_size)
+    if not version:
+        etag = f'"{thumbnail_key}{etag_suffix}"'
+        
+        # Check If-None-Match header for 304 response
+        if request.headers.get('If-None-Match') == etag:
+            return '', 304, vary_headers
     
-    # Check If-None-Match header for 304 response
-    if request.headers.get('If-None-Match') == etag:
-        return '', 304
+    mimetype = 'image/webp'
+    if use_avif:
+        thumbnail_path = get_avif_thumbnail_path(thumbnail_path)
+        mimetype = 'image/avif'
     
     # Ensure thumbnail directory exists
     ensure_thumbnail_dir()
     
-    # Get thumbnail cache path
-    thumbnail_path = get_thumbnail_path(expanded_image, file_mtime, file_size)
-    
-    # Check if thumbnail already exists in cache
-    if not os.path.exists(thumbnail_path):
+    # Check if thumbnail already exists in cache (one stat, reused for Last-Modified)
+    try:
+        thumbnail_mtime = int(os.stat(thumbnail_path).st_mtime)
+        logger.debug("Serving cached thumbnail: %s", thumbnail_path)
+    except FileNotFoundError:
         logger.debug("Creating new thumbnail for: %s", expanded_image)
         # Create thumbnail
-        if not create_thumbnail(expanded_image, thumbnail_path):
+        if not generate_thumbnail(expanded_image, thumbnail_path):
             logger.warning("Failed to create thumbnail, serving original")
             # Fall back to original if thumbnail creation fails
             return serve_image()
         logger.info("Thumbnail created: %s", thumbnail_path)
-    else:
-        logger.debug("Serving cached thumbnail: %s", thumbnail_path)
-    
-    # Serve the cached thumbnail
-    try:
-        thumbnail_stat = os.stat(thumbnail_path)
-        thumbnail_mtime = int(thumbnail_stat.st_mtime)
+        # Just written, so no need to stat it again
+        thumbnail_mtime = int(time.time())
     except OSError:
         return 'Could not read thumbnail stats', 500
     
     # Create response with caching headers
-    response = make_response(send_file(thumbnail_path, mimetype='image/webp'))
+    response = make_response(send_file(thumbnail_path, mimetype=mimetype))
     
     # Set caching headers (7 days for thumbnails, immutable because they're keyed by mtime)
     response.headers['Cache-Control'] = 'public, max-age=604800, immutable'
     response.headers['ETag'] = etag
     response.headers['Last-Modified'] = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(thumbnail_mtime))
+    response.headers.update(vary_headers)
     
     return response
 
@@ -496,7 +590,7 @@ def serve_video_poster():
     The poster is cached on disk for subsequent requests.
     """
     # Check if video poster optimization is enabled
-    optimizations = get_optimization_settings()
+    optimizations = get_optimization_settings_view()
     if not optimizations.get('video_poster_cache', False):
         # Optimization disabled - return error so frontend can show fallback
         return 'Video poster optimization disabled', 403
@@ -513,25 +607,22 @@ def serve_video_poster():
     if not is_path_allowed(expanded_video):
         return 'Access denied', 403
     
-    if not os.path.exists(expanded_video):
+    # Get file stats for cache key (single stat also checks existence)
+    exists, file_size, file_mtime = fast_stat(expanded_video)
+    if not exists:
         return 'Video not found', 404
+    file_mtime = int(file_mtime)
     
     # Verify it's a video file
-    ext = Path(expanded_video).suffix.lower()
+    ext = get_extension(expanded_video)
     if ext not in VIDEO_FORMATS:
         return 'Not a video file', 400
     
-    # Get file stats for cache key
-    try:
-        file_stat = os.stat(expanded_video)
-        file_mtime = int(file_stat.st_mtime)
-        file_size = file_stat.st_size
-    except OSError:
-        return 'Could not read file stats', 500
-    
-    # Generate ETag for the poster (based on original video)
-    etag_hash = hashlib.md5(f"{expanded_video}:{file_mtime}:{file_size}:poster".encode()).hexdigest()
-    etag = f'"{etag_hash}"'
+    # Get poster cache path (stored next to the thumbnail for the same key);
+    # the key doubles as the ETag
+    thumbnail_path, thumbnail_key = get_thumbnail_path(expanded_video, file_mtime, file_size)
+    poster_path = thumbnail_path.replace('.webp', '_poster.jpg')
+    etag = f'"{thumbnail_key}_poster"'
     
     # Check If-None-Match header for 304 response
     if request.headers.get('If-None-Match') == etag:
@@ -540,20 +631,16 @@ def serve_video_poster():
     # Ensure thumbnail directory exists
     ensure_thumbnail_dir()
     
-    # Get poster cache path
-    poster_path = get_thumbnail_path(expanded_video, file_mtime, file_size).replace('.webp', '_poster.jpg')
-    
-    # Check if poster already exists in cache
-    if not os.path.exists(poster_path):
+    # Check if poster already exists in cache (one stat, reused for Last-Modified)
+    try:
+        poster_mtime = int(os.stat(poster_path).st_mtime)
+    except FileNotFoundError:
         # Extract poster frame
-        if not create_video_poster(expanded_video, poster_path):
+        if not generate_video_poster(expanded_video, poster_path):
             # Return a placeholder or error if extraction fails
             return 'Could not extract video poster', 500
-    
-    # Serve the cached poster
-    try:
-        poster_stat = os.stat(poster_path)
-        poster_mtime = int(poster_stat.st_mtime)
+        # Just written, so no need to stat it again
+        poster_mtime = int(time.time())
     except OSError:
         return 'Could not read poster stats', 500
     
@@ -12,31 +12,40 @@ pages_bp = Blueprint('pages', __name__)
 
 # Project root directory (where static/ folder is located)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STATIC_FOLDER = os.path.join(PROJECT_ROOT, 'static')
+INDEX_PATH = os.path.join(STATIC_FOLDER, 'index.html')
+
+
+def _send_index():
+    """Send index.html as a conditional response.
+    
+    Static assets are unversioned ES modules, so nothing gets a long
+    max-age (Werkzeug's default is no-cache): browsers revalidate each
+    load and get a 304 while the file is unchanged, and always pick up a
+    new version after an update.
+    """
+    return send_file(INDEX_PATH, conditional=True)
 
 
 @pages_bp.route('/')
 def index():
     """Main page - always serves index.html which has settings modal."""
-    index_path = os.path.join(PROJECT_ROOT, 'static', 'index.html')
-    return send_file(index_path)
+    return _send_index()
 
 
 @pages_bp.route('/settings')
 def settings():
     """Settings page - redirect to main page (settings now in modal)."""
-    index_path = os.path.join(PROJECT_ROOT, 'static', 'index.html')
-    return send_file(index_path)
+    return _send_index()
 
 
 @pages_bp.route('/scroll')
 def scroll_view():
     """Main scroll view."""
-    index_path = os.path.join(PROJECT_ROOT, 'static', 'index.html')
-    return send_file(index_path)
+    return _send_index()
 
 
 @pages_bp.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files."""
-    static_folder = os.path.join(PROJECT_ROOT, 'static')
-    return send_from_directory(static_folder, filename)
+    return send_from_directory(STATIC_FOLDER, filename, conditional=True)
@@ -4,42 +4,71 @@ Handles marking, unmarking, and deleting images.
 """
 
 import os
-from urllib.parse import quote, unquote
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Optional, Tuple
+from urllib.parse import unquote
 from flask import Blueprint, request, jsonify
 
 from app.services.data import (
     load_favorites,
-    save_favorites,
+    append_favorite_removal,
     load_trash,
     save_trash,
+    append_trash,
+    append_trash_removal,
     cleanup_trash,
+    cleanup_trash_with_mtimes,
     cleanup_favorites,
 )
 from app.services.path_utils import (
     normalize_path,
     is_path_allowed,
-    format_image_url,
+    format_image_urls,
+    format_versioned_image_urls,
     extract_path_from_url,
+    IMAGE_URL_PREFIX,
 )
 from app.services.image_cache import invalidate_cache
 
 
 trash_bp = Blueprint('trash', __name__)
 
+# Deleting many files: below the threshold deletes run inline; above it they
+# run on worker threads so the unlink syscalls (which release the GIL) overlap
+_DELETE_THRESHOLD = 64
+_DELETE_WORKERS = 8
+
+
+def _delete_file(img_path: str) -> Tuple[bool, Optional[str]]:
+    """Delete one file.
+    
+    Returns:
+        (deleted, error) tuple; a file that is already gone is neither
+        deleted nor an error
+    """
+    try:
+        os.remove(img_path)
+        return True, None
+    except FileNotFoundError:
+        return False, None
+    except Exception as e:
+        return False, str(e)
+
 
 @trash_bp.route('/api/trash', methods=['GET'])
 def get_trash():
     """Get list of trashed image paths (as URL paths for frontend compatibility)."""
     trash = cleanup_trash()
     # Convert to URL format for frontend (URL-encoded for Windows paths)
-    trash_urls = [f'/image?path={quote(img, safe="")}' for img in trash]
+    trash_urls = list(format_image_urls(trash, prefix=IMAGE_URL_PREFIX))
     return jsonify({'trash': trash_urls})
 
 
 @trash_bp.route('/api/trash', methods=['POST'])
 def add_trash():
     """Add image to trash (and remove from favorites if present - mutual exclusion)."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     path = data.get('path', '').strip()
     
     if not path:
@@ -50,23 +79,21 @@ def add_trash():
     
     trash = load_trash()
     
-    if path not in trash:
-        trash.append(path)
-        save_trash(trash)
+    if trash.add(path):
+        append_trash(path)
         
         # Mutual exclusion: remove from favorites if present
         favorites = load_favorites()
-        if path in favorites:
-            favorites.remove(path)
-            save_favorites(favorites)
+        if favorites.remove(path):
+            append_favorite_removal(path)
     
-    return jsonify({'success': True, 'trash': trash})
+    return jsonify({'success': True, 'trash': trash.to_list()})
 
 
 @trash_bp.route('/api/trash', methods=['DELETE'])
 def remove_trash():
     """Remove image from trash (unmark for deletion)."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     path = data.get('path', '').strip()
     
     if not path:
@@ -77,22 +104,22 @@ def remove_trash():
     
     trash = load_trash()
     
-    if path in trash:
-        trash.remove(path)
-        save_trash(trash)
+    if trash.remove(path):
+        append_trash_removal(path)
     
-    return jsonify({'success': True, 'trash': trash})
+    return jsonify({'success': True, 'trash': trash.to_list()})
 
 
 @trash_bp.route('/api/trash/images', methods=['GET'])
 def get_trash_images():
     """Get trashed images as URLs (filtered to existing files only)."""
     sort_order = request.args.get('sort', 'newest')
-    trash = cleanup_trash()
+    # One stat per entry: the existence check also yields the mtime
+    entries = cleanup_trash_with_mtimes()
     # Sort by modification time
-    trash.sort(key=lambda x: os.path.getmtime(x) if os.path.exists(x) else 0, reverse=(sort_order == 'newest'))
+    entries.sort(key=itemgetter(1), reverse=(sort_order == 'newest'))
     # URL-encode paths for Windows compatibility
-    image_urls = [format_image_url(img) for img in trash]
+    image_urls = list(format_versioned_image_urls(entries))
     return jsonify(image_urls)
 
 
@@ -112,26 +139,31 @@ def empty_trash():
     """
     trash = load_trash()
     
+    if len(trash) < _DELETE_THRESHOLD:
+        results = [_delete_file(img_path) for img_path in trash]
+    else:
+        with ThreadPoolExecutor(max_workers=_DELETE_WORKERS) as pool:
+            results = list(pool.map(_delete_file, trash))
+    
     deleted_count = 0
     errors = []
     
-    for img_path in trash:
-        try:
-            if os.path.exists(img_path):
-                os.remove(img_path)
-                deleted_count += 1
-        except Exception as e:
-            errors.append({'path': img_path, 'error': str(e)})
+    for img_path, (deleted, error) in zip(trash, results):
+        if deleted:
+            deleted_count += 1
+        elif error is not None:
+            errors.append({'path': img_path, 'error': error})
     
     # Clear the trash list after deletion attempt
     save_trash([])
     
+    # Invalidate image cache so deleted files don't appear. This must come
+    # first: cleanup_favorites() checks existence against the cached list
+    invalidate_cache()
+    
     # Also cleanup favorites to remove any deleted files
     cleanup_favorites()
     
-    # Invalidate image cache so deleted files don't appear
-    invalidate_cache()
-    
     return jsonify({
         'success': True,
         'deleted_count': deleted_count,
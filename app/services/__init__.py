@@ -6,36 +6,76 @@ Contains business logic for path handling, caching, optimizations, and auth.
 from app.services.path_utils import (
     expand_path,
     normalize_path,
+    get_extension,
     is_path_allowed,
     validate_and_normalize_path,
+    get_image_url_prefix,
     format_image_url,
+    format_image_urls,
+    format_versioned_image_urls,
     extract_path_from_url,
 )
 from app.services.image_cache import (
     get_all_images,
     get_folder_mtime,
     invalidate_cache,
+    invalidate_folder,
+    load_persisted_cache,
+    get_image_cache_version,
+    get_image_mtimes,
     get_images_by_folder,
+    get_folder_entries,
+    get_cached_mtimes,
     get_leaf_folders,
 )
 from app.services.optimizations import (
     ensure_thumbnail_dir,
+    avif_supported,
+    ffmpeg_hwaccel_available,
     get_thumbnail_path,
+    get_avif_thumbnail_path,
     create_thumbnail,
     create_video_poster,
+    generate_thumbnail,
+    generate_video_poster,
     get_cache_key,
 )
 from app.services.data import (
     load_config,
     save_config,
+    get_config_version,
+    get_folder_list,
+    get_folder_set,
     get_optimization_settings,
+    get_optimization_settings_view,
     save_optimization_settings,
+    PathIndex,
+    FavoritesIndex,
+    TrashIndex,
     load_favorites,
+    append_favorite,
+    append_favorite_removal,
     save_favorites,
+    compact_favorites,
     cleanup_favorites,
+    cleanup_favorites_with_mtimes,
+    get_favorites_in_folder,
+    stat_mtimes,
     load_trash,
     save_trash,
+    append_trash,
+    append_trash_removal,
+    compact_trash,
     cleanup_trash,
+    cleanup_trash_with_mtimes,
+)
+from app.services.fast_stat import fast_stat, fast_stat_many
+from app.services.folder_watch import sync_watches, is_watched, has_changed, take_changed
+from app.services.json_response import (
+    dumps_bytes,
+    dumps_url_list,
+    cached_json_response,
+    stream_json_array,
 )
 from app.services.auth import (
     auth,
@@ -52,33 +92,78 @@ __all__ = [
     # Path utilities
     'expand_path',
     'normalize_path',
+    'get_extension',
     'is_path_allowed',
     'validate_and_normalize_path',
+    'get_image_url_prefix',
     'format_image_url',
+    'format_image_urls',
+    'format_versioned_image_urls',
     'extract_path_from_url',
     # Image cache
     'get_all_images',
     'get_folder_mtime',
     'invalidate_cache',
+    'invalidate_folder',
+    'load_persisted_cache',
+    'get_image_cache_version',
+    'get_image_mtimes',
     'get_images_by_folder',
+    'get_folder_entries',
+    'get_cached_mtimes',
     'get_leaf_folders',
     # Optimizations
     'ensure_thumbnail_dir',
+    'avif_supported',
+    'ffmpeg_hwaccel_available',
     'get_thumbnail_path',
+    'get_avif_thumbnail_path',
     'create_thumbnail',
     'create_video_poster',
+    'generate_thumbnail',
+    'generate_video_poster',
     'get_cache_key',
     # Data management
     'load_config',
     'save_config',
+    'get_config_version',
+    'get_folder_list',
+    'get_folder_set',
     'get_optimization_settings',
+    'get_optimization_settings_view',
     'save_optimization_settings',
+    'PathIndex',
+    'FavoritesIndex',
+    'TrashIndex',
     'load_favorites',
+    'append_favorite',
+    'append_favorite_removal',
     'save_favorites',
+    'compact_favorites',
     'cleanup_favorites',
+    'cleanup_favorites_with_mtimes',
+    'get_favorites_in_folder',
+    'stat_mtimes',
     'load_trash',
     'save_trash',
+    'append_trash',
+    'append_trash_removal',
+    'compact_trash',
     'cleanup_trash',
+    'cleanup_trash_with_mtimes',
+    # File stats
+    'fast_stat',
+    'fast_stat_many',
+    # Folder watches
+    'sync_watches',
+    'is_watched',
+    'has_changed',
+    'take_changed',
+    # JSON responses
+    'dumps_bytes',
+    'dumps_url_list',
+    'cached_json_response',
+    'stream_json_array',
     # Authentication
     'auth',
     'is_auth_enabled',
@@ -4,16 +4,166 @@ Handles loading and saving configuration, favorites, and trash data.
 """
 
 import os
+import copy
 import json
-from typing import Dict, Any, List
+from types import MappingProxyType
+from typing import IO, Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Tuple
 from filelock import FileLock
 
 from app.config import (
     CONFIG_FILE,
     FAVORITES_FILE,
+    LEGACY_FAVORITES_FILE,
     TRASH_FILE,
+    LEGACY_TRASH_FILE,
     DEFAULT_OPTIMIZATIONS,
 )
+from app.services.fast_stat import fast_stat_many
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional - fall back to stdlib json
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    # ijson is optional - legacy JSON files are parsed whole without it
+    ijson = None
+
+
+# Parsed data file cache: {path: ((mtime_ns, size), data)}
+# Repeat reads of an unchanged file become a stat + dict lookup instead of
+# open() + parse. Keyed on mtime and size so writes from other worker
+# processes are still picked up.
+_file_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+
+# Configured folders as an ordered tuple and a set, rebuilt when the cached
+# config changes
+_folder_set_cache: Dict[str, Any] = {
+    'source': None,
+    'ordered': (),
+    'folders': frozenset(),
+}
+
+# Defaults as a read-only view, returned as-is when config.json has no
+# optimizations section
+_DEFAULT_OPTIMIZATIONS_VIEW: Mapping[str, Any] = MappingProxyType(dict(DEFAULT_OPTIMIZATIONS))
+
+# Optimization settings merged with defaults (as a read-only view), rebuilt
+# when the cached config changes
+_optimization_settings_cache: Dict[str, Any] = {
+    'source': None,
+    'settings': MappingProxyType({}),
+}
+
+# Folder -> favorites index, rebuilt when the cached favorites list changes
+_favorites_folder_index: Dict[str, Any] = {
+    'source': None,
+    'folders': {},
+}
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_load(f: IO[bytes]) -> Any:
+    """Parse a JSON file opened in binary mode."""
+    return _json_loads(f.read())
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes with orjson when available.
+    
+    Args:
+        obj: Data to serialize
+        indent: Pretty-print with 2-space indentation (for hand-editable files)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) for a file, or None if it can't be stat'd."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_cached(path: str, parse: Callable[[IO[bytes]], Any]) -> Any:
+    """Read and parse a data file, reusing the cached result if unchanged.
+    
+    Callers must not mutate the returned object; copy it first.
+    
+    Args:
+        path: File to read
+        parse: Function that parses the open (binary mode) file object
+    
+    Returns:
+        Parsed data, or None if the file is missing or unreadable
+    """
+    signature = _file_signature(path)
+    if signature is None:
+        _file_cache.pop(path, None)
+        return None
+    
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    try:
+        with open(path, 'rb') as f:
+            data = parse(f)
+    except (ValueError, IOError):
+        return None
+    _file_cache[path] = (signature, data)
+    return data
+
+
+def _read_json_cached(path: str) -> Any:
+    """Read and parse a JSON file, reusing the cached result if unchanged."""
+    return _read_cached(path, _json_load)
+
+
+def _atomic_write(path: str, chunks: Iterable[bytes]) -> None:
+    """Replace a file's contents atomically. Caller must hold the file's lock.
+    
+    Writes to a temporary file next to path, fsyncs it, and renames it
+    over path, so a crash mid-write leaves either the old or the new file
+    rather than a truncated one.
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_json(path: str, data: Any) -> None:
+    """Write data to a JSON file under a file lock and refresh the cache entry."""
+    lock = FileLock(path + '.lock')
+    with lock:
+        _atomic_write(path, (_json_dumps(data, indent=True),))
+        signature = _file_signature(path)
+        if signature is not None:
+            _file_cache[path] = (signature, copy.deepcopy(data))
 
 
 def load_config() -> Dict[str, Any]:
@@ -22,13 +172,10 @@ def load_config() -> Dict[str, Any]:
     Returns:
         Configuration dictionary with 'folders' and 'shuffle' keys
     """
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {'folders': [], 'shuffle': False}
-    return {'folders': [], 'shuffle': False}
+    data = _read_json_cached(CONFIG_FILE)
+    if data is None:
+        return {'folders': [], 'shuffle': False}
+    return copy.deepcopy(data)
 
 
 def save_config(config: Dict[str, Any]) -> None:
@@ -37,25 +184,92 @@ def save_config(config: Dict[str, Any]) -> None:
     Args:
         config: Configuration dictionary to save
     """
-    lock = FileLock(CONFIG_FILE + '.lock')
-    with lock:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
+    _write_json(CONFIG_FILE, config)
+
+
+def get_config_version() -> Optional[Tuple[int, int]]:
+    """Return a token that changes whenever config.json changes on disk.
+    
+    Returns:
+        (mtime_ns, size) of the config file, or None if it doesn't exist
+    """
+    return _file_signature(CONFIG_FILE)
+
+
+def _get_folder_cache() -> Dict[str, Any]:
+    """Refresh the folder caches from the cached config if it changed."""
+    data = _read_json_cached(CONFIG_FILE)
+    folders = data.get('folders', []) if data else []
+    
+    # The cached config object is replaced whenever the file is re-read or saved
+    if _folder_set_cache['source'] is not folders:
+        _folder_set_cache['ordered'] = tuple(folders)
+        _folder_set_cache['folders'] = frozenset(folders)
+        _folder_set_cache['source'] = folders
+    
+    return _folder_set_cache
+
+
+def get_folder_list() -> Tuple[str, ...]:
+    """Get the configured folders in config order, without copying the config.
+    
+    For read-only callers on hot paths; use load_config() to modify folders.
+    Rebuilt only when config.json changes.
+    
+    Returns:
+        Tuple of configured folder paths (as stored in config)
+    """
+    return _get_folder_cache()['ordered']
+
+
+def get_folder_set() -> FrozenSet[str]:
+    """Get the configured folders as a set for O(1) membership checks.
+    
+    Rebuilt only when config.json changes.
+    
+    Returns:
+        Frozen set of configured folder paths (as stored in config)
+    """
+    return _get_folder_cache()['folders']
+
+
+def get_optimization_settings_view() -> Mapping[str, Any]:
+    """Get optimization settings with defaults as a read-only mapping.
+    
+    Returns the cached settings without copying, for hot read-only callers
+    such as URL formatting. The mapping is rebuilt only when config.json
+    changes, so don't hold on to it across requests.
+    
+    Returns:
+        Read-only mapping of optimization settings
+    """
+    data = _read_json_cached(CONFIG_FILE)
+    optimizations = data.get('optimizations') if data else None
+    
+    if optimizations is None:
+        return _DEFAULT_OPTIMIZATIONS_VIEW
+    
+    if _optimization_settings_cache['source'] is not optimizations:
+        # Apply defaults for any missing settings
+        settings = dict(DEFAULT_OPTIMIZATIONS)
+        settings.update(optimizations)
+        _optimization_settings_cache['settings'] = MappingProxyType(settings)
+        _optimization_settings_cache['source'] = optimizations
+    
+    return _optimization_settings_cache['settings']
 
 
 def get_optimization_settings() -> Dict[str, bool]:
     """Get optimization settings with defaults.
     
+    The merged settings are rebuilt only when config.json changes; callers
+    get a shallow copy they may modify (see get_optimization_settings_view()
+    for read-only use).
+    
     Returns:
         Dictionary of optimization settings
     """
-    config = load_config()
-    optimizations = config.get('optimizations', {})
-    # Apply defaults for any missing settings
-    for key, value in DEFAULT_OPTIMIZATIONS.items():
-        if key not in optimizations:
-            optimizations[key] = value
-    return optimizations
+    return dict(get_optimization_settings_view())
 
 
 def save_optimization_settings(settings: Dict[str, bool]) -> None:
@@ -69,99 +283,396 @@ def save_optimization_settings(settings: Dict[str, bool]) -> None:
     save_config(config)
 
 
-def load_favorites() -> List[str]:
-    """Load favorites from favorites.json.
+class PathIndex:
+    """Insertion-ordered set of image paths.
     
-    Returns:
-        List of favorited image paths
+    Backed by a dict so membership checks, adds, and removes are O(1)
+    instead of O(n) list scans.
+    """
+    
+    def __init__(self, paths: Iterable[str] = ()):
+        self._paths: Dict[str, None] = dict.fromkeys(paths)
+    
+    def __contains__(self, path: str) -> bool:
+        return path in self._paths
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+    
+    def __len__(self) -> int:
+        return len(self._paths)
+    
+    def add(self, path: str) -> bool:
+        """Add a path. Returns True if it was not already present."""
+        if path in self._paths:
+            return False
+        self._paths[path] = None
+        return True
+    
+    def remove(self, path: str) -> bool:
+        """Remove a path. Returns True if it was present."""
+        if path not in self._paths:
+            return False
+        del self._paths[path]
+        return True
+    
+    def to_list(self) -> List[str]:
+        """Return paths as a list, oldest first."""
+        return list(self._paths)
+
+
+class FavoritesIndex(PathIndex):
+    """Favorited image paths.
+    
+    Persisted via the favorites log (see append_favorite() and save_favorites()).
+    """
+
+
+class TrashIndex(PathIndex):
+    """Image paths marked for deletion.
+    
+    Persisted via the trash log (see append_trash() and save_trash()).
+    """
+
+
+# Favorites and trash are stored as append-only NDJSON logs
+# (favorites.ndjson, trash.ndjson):
+#   {"p": "/path/to/image.jpg"}              - added
+#   {"p": "/path/to/image.jpg", "del": true} - removed (tombstone)
+# Adding or removing a single path appends one line instead of rewriting
+# the whole file. save_favorites()/save_trash() rewrite the log compacted.
+
+def _apply_log_entry(paths: Dict[str, None], entry: Dict[str, Any]) -> None:
+    """Apply one log entry to an ordered dict of paths."""
+    if entry.get('del'):
+        paths.pop(entry['p'], None)
+    else:
+        paths[entry['p']] = None
+
+
+def _parse_path_log(f: IO[bytes]) -> Dict[str, None]:
+    """Replay a path log into an ordered dict of paths.
+    
+    Unparseable lines (e.g. a torn final write) are skipped.
+    """
+    paths: Dict[str, None] = {}
+    for line in f:
+        try:
+            _apply_log_entry(paths, _json_loads(line))
+        except (ValueError, TypeError, KeyError, AttributeError):
+            continue
+    return paths
+
+
+def _parse_legacy_paths(f: IO[bytes], key: str) -> Dict[str, None]:
+    """Read the path list from a legacy {key: [paths]} JSON file.
+    
+    With ijson the list is decoded incrementally, so migrating a huge
+    legacy file doesn't hold its full text and parsed list at once.
     """
-    if os.path.exists(FAVORITES_FILE):
+    if ijson is not None:
         try:
-            with open(FAVORITES_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('favorites', [])
-        except (json.JSONDecodeError, IOError):
-            return []
-    return []
+            return dict.fromkeys(ijson.items(f, f'{key}.item'))
+        except ijson.JSONError as e:
+            raise ValueError(str(e)) from e
+    return dict.fromkeys(_json_load(f).get(key, []))
+
+
+def _load_log_data(log_path: str) -> Dict[str, None]:
+    """Get a cached path log as an ordered dict. Do not mutate."""
+    data = _read_cached(log_path, _parse_path_log)
+    return data if data is not None else {}
+
 
+def _write_path_log(log_path: str, paths: Dict[str, None]) -> None:
+    """Rewrite a path log compacted. Caller must hold the log's file lock."""
+    _atomic_write(log_path, (_json_dumps({'p': path}) + b'\n' for path in paths))
+    signature = _file_signature(log_path)
+    if signature is not None:
+        _file_cache[log_path] = (signature, paths)
+
+
+def _append_log_entry(log_path: str, entry: Dict[str, Any]) -> None:
+    """Append one entry to a path log and patch the cached copy."""
+    lock = FileLock(log_path + '.lock')
+    with lock:
+        before = _file_signature(log_path)
+        line = _json_dumps(entry) + b'\n'
+        with open(log_path, 'a+b') as f:
+            # Terminate a torn final line left by an interrupted write
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = b'\n' + line
+            f.write(line)
+        after = _file_signature(log_path)
+        
+        # Update the cache without re-reading the log, unless another process
+        # wrote to the file since we last read it
+        cached = _file_cache.get(log_path)
+        if cached is not None and before is not None and cached[0] == before and after is not None:
+            paths = dict(cached[1])
+            _apply_log_entry(paths, entry)
+            _file_cache[log_path] = (after, paths)
+        else:
+            _file_cache.pop(log_path, None)
 
-def save_favorites(favorites: List[str]) -> None:
-    """Save favorites to favorites.json.
+
+def _save_path_log(log_path: str, paths: Iterable[str]) -> None:
+    """Rewrite a path log with exactly the given paths."""
+    lock = FileLock(log_path + '.lock')
+    with lock:
+        _write_path_log(log_path, dict.fromkeys(paths))
+
+
+def _compact_path_log(log_path: str, legacy_path: str, legacy_key: str) -> None:
+    """Compact a path log, migrating its legacy JSON file if needed.
     
     Args:
-        favorites: List of favorited image paths
+        log_path: NDJSON log file
+        legacy_path: Pre-log JSON file ({legacy_key: [paths]}), read only
+                     when the log doesn't exist yet
+        legacy_key: Key of the path list in the legacy file
     """
-    lock = FileLock(FAVORITES_FILE + '.lock')
+    lock = FileLock(log_path + '.lock')
     with lock:
-        with open(FAVORITES_FILE, 'w') as f:
-            json.dump({'favorites': favorites}, f, indent=2)
+        if os.path.exists(log_path):
+            try:
+                with open(log_path, 'rb') as f:
+                    paths = _parse_path_log(f)
+            except IOError:
+                return
+        elif os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'rb') as f:
+                    paths = _parse_legacy_paths(f, legacy_key)
+            except (ValueError, IOError, AttributeError):
+                return
+        else:
+            return
+        _write_path_log(log_path, paths)
 
 
-def cleanup_favorites() -> List[str]:
-    """Remove favorites that no longer exist on disk.
+def load_favorites() -> FavoritesIndex:
+    """Load favorites from favorites.ndjson.
+    
+    Returns:
+        FavoritesIndex of favorited image paths
+    """
+    return FavoritesIndex(_load_log_data(FAVORITES_FILE))
+
+
+def append_favorite(path: str) -> None:
+    """Record a newly added favorite with a single log append.
+    
+    Args:
+        path: Image path that was added to favorites
+    """
+    _append_log_entry(FAVORITES_FILE, {'p': path})
+
+
+def append_favorite_removal(path: str) -> None:
+    """Record a removed favorite with a single log append.
+    
+    Args:
+        path: Image path that was removed from favorites
+    """
+    _append_log_entry(FAVORITES_FILE, {'p': path, 'del': True})
+
+
+def save_favorites(favorites: Iterable[str]) -> None:
+    """Rewrite favorites.ndjson with exactly the given favorites.
+    
+    This compacts the log. For single adds/removes use append_favorite()
+    and append_favorite_removal() instead.
+    
+    Args:
+        favorites: FavoritesIndex or list of favorited image paths
+    """
+    _save_path_log(FAVORITES_FILE, favorites)
+
+
+def compact_favorites() -> None:
+    """Compact the favorites log, migrating legacy favorites.json if needed.
+    
+    Called once at startup. Drops removal entries and superseded adds so the
+    log doesn't grow without bound.
+    """
+    _compact_path_log(FAVORITES_FILE, LEGACY_FAVORITES_FILE, 'favorites')
+
+
+def stat_mtimes(paths: Iterable[str]) -> List[Tuple[str, float]]:
+    """Stat each path once, skipping any that no longer exist.
+    
+    Large lists are stat'd concurrently (see fast_stat_many()).
+    
+    Args:
+        paths: Image paths to stat
+    
+    Returns:
+        List of (path, mtime) tuples for paths that exist, in input order
+    """
+    paths = list(paths)
+    return [
+        (img_path, mtime)
+        for img_path, (exists, _, mtime) in zip(paths, fast_stat_many(paths))
+        if exists
+    ]
+
+
+def _existing_with_mtimes(paths: Iterable[str]) -> List[Tuple[str, float]]:
+    """Like stat_mtimes(), but takes paths in the cached image list from it.
+    
+    The cache is only trusted to say a path exists; paths it doesn't know
+    (files outside the configured folders, skipped videos, files added or
+    deleted since the last scan) are stat'd before being dropped. Reading
+    it never triggers a rescan (see get_cached_mtimes()).
+    """
+    # Import here to avoid circular imports
+    from app.services.image_cache import get_cached_mtimes
+    
+    paths = list(paths)
+    known = get_cached_mtimes()
+    stated = dict(stat_mtimes([img_path for img_path in paths if img_path not in known]))
+    
+    entries = []
+    for img_path in paths:
+        if img_path in known:
+            entries.append((img_path, known[img_path]))
+        elif img_path in stated:
+            entries.append((img_path, stated[img_path]))
+    return entries
+
+
+def get_favorites_in_folder(folder_path: str) -> List[str]:
+    """Get favorites whose parent directory is exactly folder_path.
+    
+    Uses a folder -> favorites index that is rebuilt only when the cached
+    favorites data changes, so repeat lookups don't scan every favorite.
+    
+    Args:
+        folder_path: Normalized folder path
+    
+    Returns:
+        List of favorited image paths in that folder (may include missing files)
+    """
+    favorites = _load_log_data(FAVORITES_FILE)
+    
+    # The cached favorites object is replaced whenever the log changes
+    if _favorites_folder_index['source'] is not favorites:
+        by_folder: Dict[str, List[str]] = {}
+        for img_path in favorites:
+            by_folder.setdefault(img_path.rpartition(os.sep)[0], []).append(img_path)
+        _favorites_folder_index['source'] = favorites
+        _favorites_folder_index['folders'] = by_folder
+    
+    return list(_favorites_folder_index['folders'].get(folder_path, []))
+
+
+def cleanup_favorites_with_mtimes() -> List[Tuple[str, float]]:
+    """Remove favorites that no longer exist on disk, returning their mtimes.
+    
+    Favorites found in the cached image list take their mtime from it;
+    the rest are stat'd once, the same stat serving as the existence check
+    and providing the modification time used for sorting.
     
     Note: We intentionally do NOT remove favorites just because their folder
     was removed from settings. This preserves favorites in case the user
     accidentally removed the folder or wants to add it back later.
     
     Returns:
-        List of valid favorites
+        List of (path, mtime) tuples for valid favorites
     """
     favorites = load_favorites()
     
-    valid_favorites = []
-    for img_path in favorites:
-        if os.path.exists(img_path):
-            valid_favorites.append(img_path)
+    valid_entries = _existing_with_mtimes(favorites)
     
-    if len(valid_favorites) != len(favorites):
-        save_favorites(valid_favorites)
+    if len(valid_entries) != len(favorites):
+        save_favorites([img_path for img_path, _ in valid_entries])
     
-    return valid_favorites
+    return valid_entries
 
 
-def load_trash() -> List[str]:
-    """Load trash from trash.json.
+def cleanup_favorites() -> List[str]:
+    """Remove favorites that no longer exist on disk.
     
     Returns:
-        List of trashed image paths
+        List of valid favorites
     """
-    if os.path.exists(TRASH_FILE):
-        try:
-            with open(TRASH_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('trash', [])
-        except (json.JSONDecodeError, IOError):
-            return []
-    return []
+    return [img_path for img_path, _ in cleanup_favorites_with_mtimes()]
+
+
+def load_trash() -> TrashIndex:
+    """Load trash from trash.ndjson.
+    
+    Returns:
+        TrashIndex of trashed image paths
+    """
+    return TrashIndex(_load_log_data(TRASH_FILE))
 
 
-def save_trash(trash: List[str]) -> None:
-    """Save trash to trash.json.
+def append_trash(path: str) -> None:
+    """Record a newly trashed image with a single log append.
     
     Args:
-        trash: List of trashed image paths
+        path: Image path that was marked for deletion
     """
-    lock = FileLock(TRASH_FILE + '.lock')
-    with lock:
-        with open(TRASH_FILE, 'w') as f:
-            json.dump({'trash': trash}, f, indent=2)
+    _append_log_entry(TRASH_FILE, {'p': path})
 
 
-def cleanup_trash() -> List[str]:
-    """Remove trash entries that no longer exist on disk.
+def append_trash_removal(path: str) -> None:
+    """Record an image removed from the trash with a single log append.
+    
+    Args:
+        path: Image path that was unmarked
+    """
+    _append_log_entry(TRASH_FILE, {'p': path, 'del': True})
+
+
+def save_trash(trash: Iterable[str]) -> None:
+    """Rewrite trash.ndjson with exactly the given paths.
+    
+    This compacts the log. For single adds/removes use append_trash()
+    and append_trash_removal() instead.
+    
+    Args:
+        trash: TrashIndex or list of trashed image paths
+    """
+    _save_path_log(TRASH_FILE, trash)
+
+
+def compact_trash() -> None:
+    """Compact the trash log, migrating legacy trash.json if needed.
+    
+    Called once at startup, like compact_favorites().
+    """
+    _compact_path_log(TRASH_FILE, LEGACY_TRASH_FILE, 'trash')
+
+
+def cleanup_trash_with_mtimes() -> List[Tuple[str, float]]:
+    """Remove trash entries that no longer exist on disk, returning their mtimes.
+    
+    Entries found in the cached image list take their mtime from it; the
+    rest are stat'd once, the same stat serving as the existence check and
+    providing the modification time used for sorting.
     
     Returns:
-        List of valid trash entries
+        List of (path, mtime) tuples for valid trash entries
     """
     trash = load_trash()
     
-    valid_trash = []
-    for img_path in trash:
-        if os.path.exists(img_path):
-            valid_trash.append(img_path)
+    valid_entries = _existing_with_mtimes(trash)
+    
+    if len(valid_entries) != len(trash):
+        save_trash([img_path for img_path, _ in valid_entries])
     
-    if len(valid_trash) != len(trash):
-        save_trash(valid_trash)
+    return valid_entries
+
+
+def cleanup_trash() -> List[str]:
+    """Remove trash entries that no longer exist on disk.
     
-    return valid_trash
+    Returns:
+        List of valid trash entries
+    """
+    return [img_path for img_path, _ in cleanup_trash_with_mtimes()]
@@ -0,0 +1,183 @@
+"""
+Fast file stat service for LocalFeed.
+Uses Linux statx() with AT_STATX_DONT_SYNC for hot-path stat calls,
+falling back to os.stat() on other platforms or older kernels.
+"""
+
+import os
+import sys
+import ctypes
+import ctypes.util
+import errno
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence, Tuple
+
+# statx() constants (linux/stat.h, linux/fcntl.h)
+_AT_FDCWD = -100
+_AT_STATX_DONT_SYNC = 0x4000  # Don't force a sync with the server (network filesystems)
+_STATX_TYPE = 0x0001
+_STATX_MTIME = 0x0040
+_STATX_SIZE = 0x0200
+_STATX_MASK = _STATX_TYPE | _STATX_MTIME | _STATX_SIZE
+
+# Batch stat tuning: below the threshold, stats run inline (thread startup
+# would dominate); above it, chunks are stat'd concurrently so metadata
+# lookups on cold caches or network filesystems overlap
+_BATCH_THRESHOLD = 512
+_BATCH_CHUNK_SIZE = 128
+_BATCH_WORKERS = 8
+
+# Errors that mean the path doesn't exist (matches os.path.exists semantics)
+_MISSING_ERRNOS = frozenset((errno.ENOENT, errno.ENOTDIR, errno.EACCES, errno.ELOOP, errno.ENAMETOOLONG))
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ('tv_sec', ctypes.c_int64),
+        ('tv_nsec', ctypes.c_uint32),
+        ('_reserved', ctypes.c_int32),
+    ]
+
+
+class _Statx(ctypes.Structure):
+    # Only the fields up to stx_mtime are named; the rest is padding so the
+    # struct matches the kernel's 256-byte layout
+    _fields_ = [
+        ('stx_mask', ctypes.c_uint32),
+        ('stx_blksize', ctypes.c_uint32),
+        ('stx_attributes', ctypes.c_uint64),
+        ('stx_nlink', ctypes.c_uint32),
+        ('stx_uid', ctypes.c_uint32),
+        ('stx_gid', ctypes.c_uint32),
+        ('stx_mode', ctypes.c_uint16),
+        ('_spare0', ctypes.c_uint16),
+        ('stx_ino', ctypes.c_uint64),
+        ('stx_size', ctypes.c_uint64),
+        ('stx_blocks', ctypes.c_uint64),
+        ('stx_attributes_mask', ctypes.c_uint64),
+        ('stx_atime', _StatxTimestamp),
+        ('stx_btime', _StatxTimestamp),
+        ('stx_ctime', _StatxTimestamp),
+        ('stx_mtime', _StatxTimestamp),
+        ('_spare', ctypes.c_uint8 * 128),
+    ]
+
+
+# Lazily probed statx() function: None = not probed yet, False = unavailable
+_statx_func = None
+
+# Per-thread reusable result buffer (avoids allocating a struct per call)
+_local = threading.local()
+
+
+def _load_statx():
+    """Return libc statx() if it is available and works, else False.
+    
+    Probed once per process: requires Linux, glibc >= 2.28, and a kernel
+    that implements statx (4.11+).
+    """
+    global _statx_func
+    if _statx_func is not None:
+        return _statx_func
+    
+    _statx_func = False
+    if not sys.platform.startswith('linux'):
+        return _statx_func
+    
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        func = libc.statx
+    except (OSError, AttributeError):
+        return _statx_func
+    
+    # No argtypes: all arguments are plain ints/bytes/byref, and skipping
+    # ctypes argument conversion keeps the call as cheap as os.stat()
+    func.restype = ctypes.c_int
+    
+    # Probe with the current directory (catches ENOSYS and seccomp filters)
+    buf = _Statx()
+    if func(_AT_FDCWD, b'.', _AT_STATX_DONT_SYNC, _STATX_MASK, ctypes.byref(buf)) == 0:
+        _statx_func = func
+    return _statx_func
+
+
+def _os_stat(path: str) -> Tuple[bool, int, float]:
+    """os.stat() fallback for fast_stat()."""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return False, 0, 0.0
+    return True, st.st_size, st.st_mtime
+
+
+def fast_stat(path: str) -> Tuple[bool, int, float]:
+    """Stat a file, returning only what the serving routes need.
+    
+    Replaces an os.path.exists() + os.stat() pair with a single call.
+    Symlinks are followed, like os.stat().
+    
+    Args:
+        path: File path to stat
+    
+    Returns:
+        (exists, size, mtime) tuple; (False, 0, 0.0) if the file doesn't exist
+    """
+    func = _load_statx()
+    if not func:
+        return _os_stat(path)
+    
+    try:
+        encoded = os.fsencode(path)
+    except (TypeError, ValueError):
+        return False, 0, 0.0
+    if b'\x00' in encoded:
+        return False, 0, 0.0
+    
+    try:
+        buf, buf_ref = _local.buf
+    except AttributeError:
+        buf = _Statx()
+        buf_ref = ctypes.byref(buf)
+        _local.buf = (buf, buf_ref)
+    
+    if func(_AT_FDCWD, encoded, _AT_STATX_DONT_SYNC, _STATX_MASK, buf_ref) != 0:
+        if ctypes.get_errno() in _MISSING_ERRNOS:
+            return False, 0, 0.0
+        return _os_stat(path)
+    
+    # The kernel may not fill every requested field on some filesystems
+    if buf.stx_mask & (_STATX_MTIME | _STATX_SIZE) != (_STATX_MTIME | _STATX_SIZE):
+        return _os_stat(path)
+    
+    stx_mtime = buf.stx_mtime
+    return True, buf.stx_size, stx_mtime.tv_sec + stx_mtime.tv_nsec / 1e9
+
+
+def _stat_chunk(paths: Sequence[str]) -> List[Tuple[bool, int, float]]:
+    """fast_stat() each path in a chunk."""
+    return [fast_stat(path) for path in paths]
+
+
+def fast_stat_many(paths: Sequence[str]) -> List[Tuple[bool, int, float]]:
+    """Stat many files, overlapping the syscalls for large batches.
+    
+    statx() releases the GIL, so worker threads keep several metadata
+    lookups in flight at once. This matters when each stat waits on disk
+    or network I/O; small batches are stat'd inline.
+    
+    Args:
+        paths: File paths to stat
+    
+    Returns:
+        List of (exists, size, mtime) tuples, in input order
+    """
+    if len(paths) < _BATCH_THRESHOLD:
+        return _stat_chunk(paths)
+    
+    chunks = [paths[i:i + _BATCH_CHUNK_SIZE] for i in range(0, len(paths), _BATCH_CHUNK_SIZE)]
+    results: List[Tuple[bool, int, float]] = []
+    with ThreadPoolExecutor(max_workers=min(_BATCH_WORKERS, len(chunks))) as pool:
+        for chunk_results in pool.map(_stat_chunk, chunks):
+            results.extend(chunk_results)
+    return results
@@ -0,0 +1,146 @@
+"""
+Folder watch service for LocalFeed.
+Watches configured folders for filesystem changes so the image cache can be
+invalidated by events instead of polling folder mtimes on every request.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Optional, Sequence, Set
+
+from app.services.path_utils import expand_path
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # watchdog is optional - folders are polled via their mtimes without it
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Event types that can change a folder's image list (watchdog also reports
+# opened/closed events, which don't)
+_CHANGE_EVENTS = frozenset(('created', 'deleted', 'modified', 'moved'))
+
+# Shared observer thread, started on first use
+_observer = None
+
+# Configured folder -> its event handler (only folders with a working watch)
+_handlers: Dict[str, '_FolderEventHandler'] = {}
+
+# Folders that reported changes since the image cache last rescanned them
+_changed: Set[str] = set()
+_changed_lock = threading.Lock()
+
+# Serializes sync_watches(); never held while handling events, since the
+# observer holds its own lock during dispatch and schedule()
+_sync_lock = threading.Lock()
+_synced_folders: Optional[Sequence[str]] = None
+
+
+class _FolderEventHandler(FileSystemEventHandler):
+    """Marks one configured folder as changed on any relevant event."""
+    
+    def __init__(self, folder: str, root: str):
+        super().__init__()
+        self.folder = folder
+        self.root = root
+        self.alive = True
+        self.watch = None
+    
+    def dispatch(self, event) -> None:
+        if event.event_type not in _CHANGE_EVENTS:
+            return
+        
+        # The watch dies with its root; fall back to polling for this folder
+        if event.is_directory and event.event_type in ('deleted', 'moved') \
+                and os.path.normpath(event.src_path) == self.root:
+            self.alive = False
+        
+        with _changed_lock:
+            _changed.add(self.folder)
+
+
+def _unschedule(handler: _FolderEventHandler) -> None:
+    """Remove a handler's watch from the observer, if it is still scheduled."""
+    try:
+        _observer.unschedule(handler.watch)
+    except (KeyError, OSError):
+        pass
+
+
+def sync_watches(folders: Sequence[str]) -> None:
+    """Watch exactly the given configured folders (recursively).
+    
+    Cheap when folders is the same object as on the previous call (the
+    cached tuple from get_folder_list()). Folders whose watch can't be set
+    up (missing folder, inotify watch limit) are left unwatched and keep
+    using mtime polling.
+    
+    Args:
+        folders: Configured folder paths, as stored in config.json
+    """
+    global _observer, _synced_folders
+    if Observer is None or folders is _synced_folders:
+        return
+    
+    with _sync_lock:
+        if folders is _synced_folders:
+            return
+        
+        if _observer is None:
+            _observer = Observer()
+            _observer.daemon = True
+            _observer.start()
+        
+        wanted = set(folders)
+        for folder in list(_handlers):
+            if folder not in wanted:
+                _unschedule(_handlers.pop(folder))
+        
+        for folder in folders:
+            handler = _handlers.get(folder)
+            if handler is not None and handler.alive:
+                continue
+            if handler is not None:
+                # Watch died with its root folder; try again for the new config
+                _unschedule(_handlers.pop(folder))
+            
+            root = os.path.normpath(expand_path(folder))
+            handler = _FolderEventHandler(folder, root)
+            try:
+                handler.watch = _observer.schedule(handler, root, recursive=True)
+            except Exception as e:
+                logger.warning("Can't watch %s, polling for changes instead: %s", root, e)
+                continue
+            _handlers[folder] = handler
+        
+        with _changed_lock:
+            _changed.intersection_update(wanted)
+        _synced_folders = folders
+
+
+def is_watched(folder: str) -> bool:
+    """Check whether change events are being delivered for a configured folder."""
+    handler = _handlers.get(folder)
+    return handler is not None and handler.alive
+
+
+def has_changed(folder: str) -> bool:
+    """Check whether a folder reported changes since the last take_changed()."""
+    return folder in _changed
+
+
+def take_changed() -> Set[str]:
+    """Return and clear the set of folders that reported changes.
+    
+    Call before rescanning, so events arriving during the scan mark the
+    folder changed again instead of being lost.
+    """
+    with _changed_lock:
+        changed = set(_changed)
+        _changed.clear()
+    return changed
@@ -4,29 +4,63 @@ Provides cached access to the list of images from configured folders.
 """
 
 import os
+import stat
 import time
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+import logging
+import marshal
+import tempfile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
 from app.config import (
     CACHE_TTL,
-    SUPPORTED_FORMATS,
-    VIDEO_FORMATS,
+    EXT_INFO,
+    IMAGE_CACHE_FILE,
     MAX_VIDEO_SIZE,
 )
 from app.services.path_utils import expand_path, normalize_path
+from app.services.folder_watch import sync_watches, is_watched, has_changed, take_changed
 
+try:
+    import numpy
+except ImportError:
+    # numpy is optional - image lists are sorted with sorted() without it
+    numpy = None
+
+logger = logging.getLogger(__name__)
 
 # Image list cache (with TTL)
 _image_cache: Dict[str, Any] = {
     'images': None,
     'timestamp': 0,
-    'folder_mtimes': {}  # Track folder modification times
+    'folder_mtimes': {},  # Track folder modification times
+    'folder_entries': {},  # Per configured folder: ([path, ...], array of mtimes)
+    'mtimes': array('d'),  # mtime of each path in 'images', newest first
+    'version': 0  # Bumped whenever the image list is rebuilt
 }
 
+# Layout version of IMAGE_CACHE_FILE; files with another version are ignored
+_PERSIST_FORMAT = 1
+
+# Maximum number of configured folders walked concurrently on a rescan
+_SCAN_WORKERS = 8
+
 # Leaf folders cache (computed from image list)
 _leaf_folders_cache: List[Dict[str, Any]] = []
 
+# Images grouped by parent folder, rebuilt when the merged image list changes
+_folder_index: Dict[str, Any] = {
+    'source': None,
+    'entries': {},  # {folder: ([path, ...], [mtime, ...])}, newest first
+}
+
+# Path -> mtime lookup over the cached image list, rebuilt when it changes
+_mtime_index: Dict[str, Any] = {
+    'source': None,
+    'mtimes': {},
+}
+
 
 def get_folder_mtime(folder_path: str) -> float:
     """Get the max mtime of folder and its direct subdirectories.
@@ -42,26 +76,30 @@ def get_folder_mtime(folder_path: str) -> float:
     Returns:
         Most recent modification time as timestamp, or 0 if folder doesn't exist
     """
-    if not os.path.isdir(folder_path):
-        return 0
     try:
-        max_mtime = os.path.getmtime(folder_path)
-        for entry in os.scandir(folder_path):
-            if entry.is_dir(follow_symlinks=False):
-                try:
-                    max_mtime = max(max_mtime, entry.stat().st_mtime)
-                except OSError:
-                    pass
+        # One stat serves as both the directory check and the folder's mtime
+        st = os.stat(folder_path)
+        if not stat.S_ISDIR(st.st_mode):
+            return 0
+        max_mtime = st.st_mtime
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                # is_dir() uses the type from the directory listing (no syscall)
+                if entry.is_dir(follow_symlinks=False):
+                    try:
+                        max_mtime = max(max_mtime, entry.stat().st_mtime)
+                    except OSError:
+                        pass
         return max_mtime
     except OSError:
         return 0
 
 
-def _is_cache_valid(config: Dict[str, Any]) -> bool:
+def _is_cache_valid(current_folders: Sequence[str]) -> bool:
     """Check if the cached image list is still valid.
     
     Args:
-        config: Current configuration dictionary
+        current_folders: Currently configured folders
         
     Returns:
         True if cache is valid, False otherwise
@@ -74,14 +112,18 @@ def _is_cache_valid(config: Dict[str, Any]) -> bool:
         return False
     
     # Check if folders have changed
-    current_folders = config.get('folders', [])
     cached_mtimes = _image_cache.get('folder_mtimes', {})
     
     if set(current_folders) != set(cached_mtimes.keys()):
         return False
     
-    # Check if any folder has been modified
+    # Check if any folder has been modified. Watched folders report changes
+    # through filesystem events; the rest are polled via their mtimes
     for folder in current_folders:
+        if has_changed(folder):
+            return False
+        if is_watched(folder):
+            continue
         expanded_path = expand_path(folder)
         current_mtime = get_folder_mtime(expanded_path)
         if current_mtime > cached_mtimes.get(folder, 0):
@@ -96,9 +138,195 @@ def invalidate_cache() -> None:
     _image_cache['images'] = None
     _image_cache['timestamp'] = 0
     _image_cache['folder_mtimes'] = {}
+    _image_cache['folder_entries'] = {}
+    _image_cache['mtimes'] = array('d')
+    _leaf_folders_cache = []
+    _folder_index['source'] = None
+    _folder_index['entries'] = {}
+    _mtime_index['source'] = None
+    _mtime_index['mtimes'] = {}
+
+
+def invalidate_folder(folder_path: str) -> None:
+    """Invalidate cached scan results for one folder and anything under it.
+    
+    Scan results for other configured folders are kept, so the next
+    get_all_images() call re-walks only the affected folder (e.g. one that
+    was just added) instead of the whole library.
+    
+    Args:
+        folder_path: Normalized path of the added or removed folder
+    """
+    global _leaf_folders_cache
+    prefix = folder_path.rstrip(os.sep) + os.sep
+    folder_entries = _image_cache['folder_entries']
+    for folder in list(folder_entries):
+        normalized = normalize_path(folder)
+        if normalized == folder_path or normalized.startswith(prefix):
+            del folder_entries[folder]
+            _image_cache['folder_mtimes'].pop(folder, None)
+    
+    # Merged list and leaf folders are rebuilt from the remaining entries
+    _image_cache['images'] = None
     _leaf_folders_cache = []
 
 
+def _scan_folder(expanded_path: str) -> Tuple[List[str], array]:
+    """Walk a folder and collect supported media files.
+    
+    A single os.scandir() pass: each supported file is stat'd once via its
+    DirEntry, and that stat provides both the video size check and the
+    mtime used for sorting. Visits files in the same order as os.walk()
+    (top-down, symlinked directories not followed).
+    
+    Mtimes are stored in a parallel array of doubles rather than as
+    (path, mtime) tuples, saving a tuple and a float object per file.
+    
+    Args:
+        expanded_path: Expanded path of a configured folder
+    
+    Returns:
+        (paths, mtimes) in walk order
+    """
+    get_ext_info = EXT_INFO.get
+    paths: List[str] = []
+    mtimes = array('d')
+    stack = [expanded_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue  # Skip unreadable directories (like os.walk)
+        
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+                continue
+            
+            # Slice from the last dot and look the suffix up directly (cheaper
+            # than a regex search per file). Every EXT_INFO key starts with a
+            # dot, so names without one (rfind() == -1) never match. Most
+            # names are already lowercase, so lowercase only on a miss
+            name = entry.name
+            ext = name[name.rfind('.'):]
+            ext_info = get_ext_info(ext) or get_ext_info(ext.lower())
+            if ext_info is None:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                if ext_info[0]:
+                    continue  # Skip videos if can't read file
+                paths.append(entry.path)
+                mtimes.append(0)
+                continue
+            # Check video size limit (ext_info[0] is is_video)
+            if ext_info[0] and st.st_size > MAX_VIDEO_SIZE:
+                continue  # Skip videos over size limit
+            paths.append(entry.path)
+            mtimes.append(st.st_mtime)
+        
+        # Visit subdirectories depth-first in listing order
+        stack.extend(reversed(subdirs))
+    return paths, mtimes
+
+
+def _sort_newest_first(paths: List[str], mtimes: array) -> Tuple[List[str], array]:
+    """Sort paths and their parallel mtimes by mtime, newest first.
+    
+    The sort is stable, so files with equal mtimes keep their scan order.
+    With numpy, the mtimes buffer is argsorted in C without a Python key
+    call per element.
+    
+    Returns:
+        (sorted paths, sorted mtimes)
+    """
+    if numpy is not None:
+        values = numpy.frombuffer(mtimes, dtype=numpy.float64)
+        # Negate instead of reversing so ties keep their original order
+        order = numpy.argsort(-values, kind='stable')
+        sorted_mtimes = array('d')
+        sorted_mtimes.frombytes(values[order].tobytes())
+        return [paths[i] for i in order.tolist()], sorted_mtimes
+    
+    order = sorted(range(len(paths)), key=mtimes.__getitem__, reverse=True)
+    return [paths[i] for i in order], array('d', [mtimes[i] for i in order])
+
+
+def load_persisted_cache() -> None:
+    """Restore per-folder scan results saved by a previous process.
+    
+    Called once at startup so the first request after a restart doesn't
+    walk every folder. The restored results count as a scan that just
+    finished: the next get_all_images() re-walks only folders whose mtime
+    changed (or that are new), and the usual full rescan follows once
+    CACHE_TTL expires. Missing, corrupt, or outdated files are ignored.
+    """
+    try:
+        with open(IMAGE_CACHE_FILE, 'rb') as f:
+            data = marshal.load(f)
+        if data.get('format') != _PERSIST_FORMAT:
+            return
+        folder_mtimes = dict(data['folder_mtimes'])
+        folder_entries = {}
+        for folder, (paths, mtime_bytes) in data['folder_entries'].items():
+            mtimes = array('d')
+            mtimes.frombytes(mtime_bytes)
+            if len(mtimes) != len(paths):
+                return
+            folder_entries[folder] = (paths, mtimes)
+    except (OSError, EOFError, ValueError, TypeError, KeyError, AttributeError):
+        return
+    if set(folder_entries) != set(folder_mtimes):
+        return
+    
+    _image_cache['images'] = None
+    _image_cache['timestamp'] = time.time()
+    _image_cache['folder_mtimes'] = folder_mtimes
+    _image_cache['folder_entries'] = folder_entries
+
+
+def _save_persisted_cache(folder_entries: Dict[str, Tuple[List[str], array]], folder_mtimes: Dict[str, float]) -> None:
+    """Write per-folder scan results to IMAGE_CACHE_FILE (see load_persisted_cache()).
+    
+    marshal handles the path lists and mtime bytes quickly and, unlike
+    pickle, can't run code when loaded. The file is written to a unique
+    temp file (rebuilds on different threads or workers may save at once),
+    fsynced, and renamed over IMAGE_CACHE_FILE, as data._atomic_write() does.
+    """
+    blob = marshal.dumps({
+        'format': _PERSIST_FORMAT,
+        'folder_mtimes': folder_mtimes,
+        'folder_entries': {
+            folder: (paths, mtimes.tobytes()) for folder, (paths, mtimes) in folder_entries.items()
+        },
+    })
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(IMAGE_CACHE_FILE), prefix='.image_cache.', suffix='.tmp'
+        )
+        with os.fdopen(fd, 'wb') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, IMAGE_CACHE_FILE)
+    except OSError as e:
+        logger.debug("Could not persist image cache: %s", e)
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
 def get_all_images() -> List[str]:
     """Scan all configured folders and return list of image paths (with caching).
     
@@ -106,55 +334,126 @@ def get_all_images() -> List[str]:
         List of image file paths, sorted by modification time (newest first)
     """
     # Import here to avoid circular imports
-    from app.services.data import load_config
+    from app.services.data import get_folder_list
+    
+    folders = get_folder_list()
     
-    config = load_config()
+    # Start or update folder watches before scanning, so no change is missed
+    sync_watches(folders)
     
     # Check cache validity
-    if _is_cache_valid(config):
+    if _is_cache_valid(folders):
         return _image_cache['images']
     
-    # Cache miss or invalid - rescan
-    # Use (path, mtime) tuples to avoid calling getmtime twice per file
-    image_entries = []  # List of (path, mtime) tuples
+    # Cache miss or invalid. Scan results are kept per configured folder, so
+    # only folders that are new, modified, or invalidated are re-walked.
+    # An expired TTL still forces a full rescan.
+    now = time.time()
+    full_rescan = now - _image_cache['timestamp'] > CACHE_TTL
+    cached_entries = {} if full_rescan else _image_cache['folder_entries']
+    cached_mtimes = {} if full_rescan else _image_cache['folder_mtimes']
+    changed = take_changed()
+    
+    folder_entries = {}
     folder_mtimes = {}
+    to_scan = []  # (folder_path, expanded_path) pairs that need a walk
     
-    for folder_path in config.get('folders', []):
+    for folder_path in folders:
         expanded_path = expand_path(folder_path)
         if os.path.isdir(expanded_path):
             # Track folder modification time
-            folder_mtimes[folder_path] = get_folder_mtime(expanded_path)
-            
-            for root, dirs, files in os.walk(expanded_path):
-                for file in files:
-                    if Path(file).suffix.lower() in SUPPORTED_FORMATS:
-                        full_path = os.path.join(root, file)
-                        # Check video size limit
-                        if Path(file).suffix.lower() in VIDEO_FORMATS:
-                            try:
-                                if os.path.getsize(full_path) > MAX_VIDEO_SIZE:
-                                    continue  # Skip videos over size limit
-                            except OSError:
-                                continue  # Skip if can't read file
-                        # Cache mtime during initial scan to avoid double lookup
-                        try:
-                            mtime = os.path.getmtime(full_path)
-                        except OSError:
-                            mtime = 0
-                        image_entries.append((full_path, mtime))
+            folder_mtime = get_folder_mtime(expanded_path)
+            entries = cached_entries.get(folder_path)
+            if entries is None or folder_path in changed or folder_mtime > cached_mtimes.get(folder_path, 0):
+                to_scan.append((folder_path, expanded_path))
+            else:
+                folder_entries[folder_path] = entries
+            folder_mtimes[folder_path] = folder_mtime
+    
+    # Walk folders concurrently: each may be on a different disk or share,
+    # and scandir/stat release the GIL while waiting on I/O
+    expanded_paths = [expanded_path for _, expanded_path in to_scan]
+    if len(to_scan) > 1:
+        with ThreadPoolExecutor(max_workers=min(_SCAN_WORKERS, len(to_scan))) as pool:
+            scanned = list(pool.map(_scan_folder, expanded_paths))
+    else:
+        scanned = [_scan_folder(expanded_path) for expanded_path in expanded_paths]
+    for (folder_path, _), entries in zip(to_scan, scanned):
+        folder_entries[folder_path] = entries
+    
+    # Merge in config order (keeps the stable sort's tie order)
+    all_paths: List[str] = []
+    all_mtimes = array('d')
+    for folder_path in folder_mtimes:
+        paths, mtimes = folder_entries[folder_path]
+        all_paths.extend(paths)
+        all_mtimes.extend(mtimes)
     
     # Sort by modification time (newest first) for a more natural feel
-    image_entries.sort(key=lambda x: x[1], reverse=True)
-    images = [entry[0] for entry in image_entries]
+    images, sorted_mtimes = _sort_newest_first(all_paths, all_mtimes)
+    
+    # Keep scan results across restarts; skipped when nothing changed, so
+    # periodic TTL rescans of an unchanged library don't rewrite the file
+    if folder_entries != _image_cache['folder_entries'] or folder_mtimes != _image_cache['folder_mtimes']:
+        _save_persisted_cache(folder_entries, folder_mtimes)
     
     # Update cache
     _image_cache['images'] = images
-    _image_cache['timestamp'] = time.time()
+    _image_cache['version'] += 1
+    if full_rescan:
+        _image_cache['timestamp'] = now
     _image_cache['folder_mtimes'] = folder_mtimes
+    _image_cache['folder_entries'] = folder_entries
+    _image_cache['mtimes'] = sorted_mtimes
     
     return images
 
 
+def get_image_cache_version() -> int:
+    """Get a counter that changes whenever the cached image list is rebuilt.
+    
+    Call after get_all_images() so the version reflects the current list.
+    Used to key serialized responses derived from the image list.
+    """
+    return _image_cache['version']
+
+
+def get_image_mtimes() -> array:
+    """Get the mtimes parallel to the list returned by get_all_images().
+    
+    Call after get_all_images(); shared with the cache - don't modify.
+    """
+    return _image_cache['mtimes']
+
+
+def _get_folder_index() -> Dict[str, Any]:
+    """Get images grouped by parent folder from the cached image list.
+    
+    Built in one pass over the merged image list and its mtimes each time
+    the image list is rebuilt, so folder lookups don't rescan every image.
+    The list is sorted newest first, so each folder's lists keep that
+    order and its first mtime is the folder's newest. Paths and mtimes are
+    stored together so a reader gets both from the same rebuild.
+    
+    Returns:
+        The _folder_index dict ('entries' by folder)
+    """
+    mtimes = _image_cache['mtimes']
+    if _folder_index['source'] is not mtimes:
+        entries: Dict[str, Tuple[List[str], List[float]]] = {}
+        dirname = os.path.dirname
+        for img, mtime in zip(_image_cache['images'], mtimes):
+            folder = dirname(img)
+            entry = entries.get(folder)
+            if entry is None:
+                entries[folder] = entry = ([], [])
+            entry[0].append(img)
+            entry[1].append(mtime)
+        _folder_index['entries'] = entries
+        _folder_index['source'] = mtimes
+    return _folder_index
+
+
 def get_images_by_folder(folder_path: str) -> List[str]:
     """Get list of images from a specific folder.
     
@@ -162,11 +461,52 @@ def get_images_by_folder(folder_path: str) -> List[str]:
         folder_path: Path to the folder to filter by
         
     Returns:
-        List of image file paths in that folder
+        List of image file paths in that folder, newest first (shared with
+        the cache - don't modify)
     """
-    images = get_all_images()
-    filtered_images = [img for img in images if os.path.dirname(img) == folder_path]
-    return filtered_images
+    return get_folder_entries(folder_path)[0]
+
+
+def get_folder_entries(folder_path: str) -> Tuple[List[str], List[float]]:
+    """Get the images in a specific folder together with their mtimes.
+    
+    Both lists come from the same snapshot of the folder index, so they
+    stay parallel even if the image list is rebuilt concurrently.
+    
+    Args:
+        folder_path: Path to the folder to filter by
+        
+    Returns:
+        (paths, mtimes) tuple, newest first (shared with the cache - don't modify)
+    """
+    get_all_images()
+    return _get_folder_index()['entries'].get(folder_path, ([], []))
+
+
+def get_cached_mtimes() -> Dict[str, float]:
+    """Get {path: mtime} for every image in the last scan, without rescanning.
+    
+    Lets callers that need existence checks and mtimes (favorites and trash
+    cleanup) skip a stat per known file. Never triggers a scan, so those
+    requests can't pay for a library rescan; an empty dict is returned
+    before the first scan and once the scan is older than CACHE_TTL, and
+    callers stat every path instead. Only a positive signal: paths missing
+    from it may still exist and must be stat'd before being dropped.
+    
+    Returns:
+        Path to mtime mapping (shared with the cache - don't modify)
+    """
+    images = _image_cache['images']
+    mtimes = _image_cache['mtimes']
+    # Lengths differ while a rebuild is swapping the two in
+    if images is None or len(images) != len(mtimes) \
+            or time.time() - _image_cache['timestamp'] > CACHE_TTL:
+        return {}
+    
+    if _mtime_index['source'] is not mtimes:
+        _mtime_index['mtimes'] = dict(zip(images, mtimes))
+        _mtime_index['source'] = mtimes
+    return _mtime_index['mtimes']
 
 
 def get_leaf_folders() -> List[Dict[str, Any]]:
@@ -184,27 +524,14 @@ def get_leaf_folders() -> List[Dict[str, Any]]:
     if _leaf_folders_cache:
         return _leaf_folders_cache
     
-    # Compute folder data from image list
-    images = get_all_images()
-    
-    # Count images and track newest modification time per folder
-    folder_data: Dict[str, Dict[str, Any]] = {}
-    for img in images:
-        folder = os.path.dirname(img)
-        if folder not in folder_data:
-            folder_data[folder] = {'count': 0, 'newest_mtime': 0}
-        folder_data[folder]['count'] += 1
-        # Track the newest file modification time in this folder
-        try:
-            mtime = os.path.getmtime(img)
-            if mtime > folder_data[folder]['newest_mtime']:
-                folder_data[folder]['newest_mtime'] = mtime
-        except OSError:
-            pass
+    # Compute folder data from the scanned paths and mtimes, so no
+    # extra stat per image is needed
+    get_all_images()
+    entries = _get_folder_index()['entries']
     
     # Convert to list of folder info objects
     folders = []
-    for folder_path, data in folder_data.items():
+    for folder_path, (paths, mtimes) in entries.items():
         # Extract folder name (last component of path)
         parts = folder_path.replace('\\', '/').split('/')
         folder_name = parts[-1] if parts else folder_path
@@ -212,8 +539,8 @@ def get_leaf_folders() -> List[Dict[str, Any]]:
         folders.append({
             'path': folder_path,
             'name': folder_name,
-            'count': data['count'],
-            'newest_mtime': data['newest_mtime']
+            'count': len(paths),
+            'newest_mtime': mtimes[0]
         })
     
     # Cache the result
@@ -0,0 +1,149 @@
+"""
+JSON response helpers for LocalFeed.
+Caches serialized response bodies for hot GET endpoints whose data rarely changes.
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Tuple
+from flask import current_app, request
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional - fall back to stdlib json
+    orjson = None
+
+
+# Cache-Control for cached JSON responses: browsers may store them but must
+# revalidate with If-None-Match on every use, getting a 304 while unchanged
+CACHED_JSON_CACHE_CONTROL = 'private, max-age=0, must-revalidate'
+
+# Number of array items serialized per chunk when streaming
+STREAM_CHUNK_SIZE = 1000
+
+# Maximum number of serialized bodies kept (each can be megabytes for a
+# large library); the least recently used are evicted first
+RESPONSE_CACHE_SIZE = 64
+
+# Serialized response cache: {key: (version, body_bytes, etag)}, LRU order
+_response_cache: 'OrderedDict[str, Tuple[Hashable, bytes, str]]' = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize obj to compact JSON bytes with sorted keys.
+    
+    Matches the key ordering of Flask's jsonify() output.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()
+
+
+def dumps_url_list(urls: Iterable[str]) -> bytes:
+    """Serialize URLs from format_image_urls() as a JSON array.
+    
+    Those URLs (and the &v= versions from format_versioned_image_urls())
+    are percent-encoded ASCII (quote(..., safe='')) and never contain
+    characters JSON must escape, so the array is built with one
+    join instead of per-item serialization.
+    
+    Args:
+        urls: URLs produced by format_image_urls() or format_versioned_image_urls()
+    
+    Returns:
+        JSON array bytes (same output as dumps_bytes(list(urls)))
+    """
+    joined = '","'.join(urls)
+    if not joined:
+        # Distinguish an empty list from a list holding one empty string
+        return b'[]'
+    return b'["' + joined.encode('ascii') + b'"]'
+
+
+def cached_json_response(key: str, version: Hashable, builder: Callable[[], Any]):
+    """Return a JSON response, reusing the serialized body while version is unchanged.
+    
+    The body is rebuilt and re-serialized only when version differs from the
+    cached one. At most RESPONSE_CACHE_SIZE bodies are kept (LRU), and a
+    rebuild also drops other entries still holding the replaced version.
+    Callers must keep keys bounded (no raw request values). Responses carry an ETag derived from the body and a
+    Cache-Control that makes browsers revalidate on each use; requests whose
+    If-None-Match matches get a 304 without any serialization work.
+    
+    Args:
+        key: Cache key identifying the endpoint/payload
+        version: Token that changes whenever the underlying data changes
+                 (e.g. the source file's mtime/size signature)
+        builder: Called on cache miss to produce the JSON-serializable payload,
+                 or the already-serialized JSON body as bytes
+    
+    Returns:
+        Flask response (200 with body, or 304)
+    """
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            _response_cache.move_to_end(key)
+    
+    if cached is None or cached[0] != version:
+        payload = builder()
+        body = payload if isinstance(payload, bytes) else dumps_bytes(payload)
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        stale_version = None if cached is None else cached[0]
+        cached = (version, body, etag)
+        with _response_cache_lock:
+            _response_cache[key] = cached
+            _response_cache.move_to_end(key)
+            if stale_version is not None:
+                # Other bodies built from the superseded data are stale too
+                for other in [k for k, v in _response_cache.items() if v[0] == stale_version]:
+                    del _response_cache[other]
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    
+    _, body, etag = cached
+    headers = {
+        'ETag': etag,
+        'Cache-Control': CACHED_JSON_CACHE_CONTROL,
+    }
+    
+    # Check If-None-Match header for 304 response
+    if request.headers.get('If-None-Match') == etag:
+        return '', 304, headers
+    
+    return current_app.response_class(body, mimetype='application/json', headers=headers)
+
+
+def stream_json_array(items: Iterable[Any], chunk_size: int = STREAM_CHUNK_SIZE):
+    """Return a response that streams items as a JSON array.
+    
+    Items are serialized lazily in chunks, so neither the full list of
+    values nor the full JSON string is held in memory at once. Useful for
+    long URL lists such as /api/favorites/images.
+    
+    Args:
+        items: Iterable of JSON-serializable values (consumed lazily)
+        chunk_size: Number of items serialized per yielded chunk
+    
+    Returns:
+        Streaming Flask response with mimetype application/json
+    """
+    def generate():
+        yield b'['
+        separator = b''
+        batch = []
+        for item in items:
+            batch.append(dumps_bytes(item))
+            if len(batch) >= chunk_size:
+                yield separator + b','.join(batch)
+                separator = b','
+                batch = []
+        if batch:
+            yield separator + b','.join(batch)
+        yield b']'
+    
+    return current_app.response_class(generate(), mimetype='application/json')
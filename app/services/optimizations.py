@@ -4,19 +4,65 @@ Handles thumbnail generation and video poster extraction.
 """
 
 import os
+import base64
 import hashlib
 import subprocess
 import logging
-from typing import Optional
+import threading
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional, Tuple
 
 from app.config import (
     THUMBNAIL_DIR,
     THUMBNAIL_MAX_SIZE,
     THUMBNAIL_QUALITY,
+    THUMBNAIL_CACHE_VERSION,
+    AVIF_QUALITY,
+    AVIF_SPEED,
 )
 
+try:
+    import pyvips
+except (ImportError, OSError):
+    # pyvips is optional (and needs libvips installed) - Pillow is used without it
+    pyvips = None
+
+try:
+    import av
+except ImportError:
+    # PyAV is optional - posters are extracted with the ffmpeg CLI without it
+    av = None
+
 logger = logging.getLogger(__name__)
 
+# Thumbnail/poster generation pool, sized to the CPU count (Pillow releases
+# the GIL while decoding, resizing, and encoding)
+_GENERATION_WORKERS = os.cpu_count() or 4
+_executor = ThreadPoolExecutor(max_workers=_GENERATION_WORKERS, thread_name_prefix='thumbnail')
+
+# PyAV poster decodes run on their own threads so a stuck decode (corrupt
+# container, stalled network mount) can be abandoned after
+# _AV_POSTER_TIMEOUT seconds in favor of the ffmpeg CLI, which has its own
+# timeout. Separate from _executor so abandoned decodes can't starve it
+_av_executor = ThreadPoolExecutor(max_workers=_GENERATION_WORKERS, thread_name_prefix='video-poster')
+_AV_POSTER_TIMEOUT = 2
+
+# In-flight generation jobs by target path, so concurrent requests for the
+# same missing thumbnail share one job instead of each encoding it
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+# Size of the per-process thumbnail path / cache key memos. Keys include the
+# source mtime and size, so a modified file never hits a stale entry
+_KEY_CACHE_SIZE = 65536
+
+# Whether Pillow can encode AVIF: None = not probed yet
+_avif_supported: Optional[bool] = None
+
+# Whether ffmpeg reports any hardware decoders: None = not probed yet
+_ffmpeg_hwaccel: Optional[bool] = None
+
 
 def ensure_thumbnail_dir() -> None:
     """Ensure the thumbnail cache directory exists."""
@@ -24,37 +70,136 @@ def ensure_thumbnail_dir() -> None:
         os.makedirs(THUMBNAIL_DIR, exist_ok=True)
 
 
-def get_thumbnail_path(image_path: str, file_mtime: int, file_size: int) -> str:
+def avif_supported() -> bool:
+    """Check whether Pillow can encode AVIF thumbnails.
+    
+    Pillow 11.2+ has native AVIF support when built with libavif; older
+    versions need the optional pillow-avif-plugin package. Probed once.
+    """
+    global _avif_supported
+    if _avif_supported is None:
+        try:
+            from PIL import features
+            _avif_supported = bool(features.check('avif'))
+        except (ImportError, ValueError):
+            _avif_supported = False
+        
+        if not _avif_supported:
+            try:
+                import pillow_avif  # noqa: F401 - registers the AVIF plugin
+                _avif_supported = True
+            except ImportError:
+                _avif_supported = False
+    return _avif_supported
+
+
+def ffmpeg_hwaccel_available() -> bool:
+    """Check whether ffmpeg lists any hardware decoders (`ffmpeg -hwaccels`).
+    
+    When it does, posters are decoded with `-hwaccel auto`, letting ffmpeg
+    pick QSV/VAAPI/NVDEC/VideoToolbox as available. Probed once.
+    """
+    global _ffmpeg_hwaccel
+    if _ffmpeg_hwaccel is None:
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-hwaccels'],
+                capture_output=True,
+                timeout=5
+            )
+            # Output is a header line followed by one accelerator per line
+            lines = result.stdout.decode(errors='replace').splitlines()[1:]
+            _ffmpeg_hwaccel = result.returncode == 0 and any(line.strip() for line in lines)
+        except (OSError, subprocess.TimeoutExpired):
+            _ffmpeg_hwaccel = False
+        logger.debug("ffmpeg hardware decoding available: %s", _ffmpeg_hwaccel)
+    return _ffmpeg_hwaccel
+
+
+def get_avif_thumbnail_path(thumbnail_path: str) -> str:
+    """Return the AVIF variant path for a WebP thumbnail path."""
+    return thumbnail_path[:-len('.webp')] + '.avif'
+
+
+@lru_cache(maxsize=_KEY_CACHE_SIZE)
+def get_thumbnail_path(image_path: str, file_mtime: int, file_size: int) -> Tuple[str, str]:
     """Generate a unique cache path for a thumbnail based on image path and stats.
     
+    The key is an 80-bit BLAKE2b digest in lowercase base32 (16 characters),
+    plenty for a cache keyed on path, mtime, and size; short names keep
+    directory lookups fast. Thumbnails are sharded into 1024 subdirectories
+    by the key's first two characters, keeping each directory small for
+    large libraries. The subdirectory is created when the thumbnail is
+    written. Memoized, since the same images are requested over and over.
+    
     Args:
         image_path: Path to the source image
         file_mtime: Modification time of the source file
         file_size: Size of the source file in bytes
-        
+    
     Returns:
-        Path where the thumbnail should be stored
+        (path, key) tuple: path where the thumbnail should be stored, and the
+        cache key it was derived from. The key identifies this exact
+        version of the source, so it doubles as the thumbnail's ETag.
     """
     # Include cache version to invalidate old caches when we fix bugs
-    # Version 2: Added EXIF orientation handling
-    CACHE_VERSION = 2
-    cache_key = hashlib.md5(f"{image_path}:{file_mtime}:{file_size}:v{CACHE_VERSION}".encode()).hexdigest()
-    return os.path.join(THUMBNAIL_DIR, f"{cache_key}.webp")
+    digest = hashlib.blake2b(
+        f"{image_path}:{file_mtime}:{file_size}:v{THUMBNAIL_CACHE_VERSION}".encode(),
+        digest_size=10
+    ).digest()
+    key = base64.b32encode(digest).decode('ascii').lower()
+    return os.path.join(THUMBNAIL_DIR, key[:2], f"{key[2:]}.webp"), key
+
+
+def _create_thumbnail_vips(source_path: str, target_path: str, max_size: int, quality: int) -> bool:
+    """Create a WebP thumbnail with libvips (see create_thumbnail()).
+    
+    libvips decodes with shrink-on-load and streams decode, resize, and
+    encode in one pipeline, which is much faster and lighter on memory
+    than decoding the full image in Pillow. Output matches the Pillow
+    path: EXIF orientation applied, transparency flattened onto white,
+    sRGB, and no metadata.
+    
+    Returns:
+        bool: True if the thumbnail was written, False to fall back to Pillow
+    """
+    try:
+        # Autorotates from EXIF orientation; size='down' never upscales
+        image = pyvips.Image.thumbnail(source_path, max_size, height=max_size, size='down')
+        if image.hasalpha():
+            image = image.flatten(background=[255, 255, 255])
+        if image.interpretation != 'srgb':
+            image = image.colourspace('srgb')
+        
+        if pyvips.at_least_libvips(8, 15):
+            image.webpsave(target_path, Q=quality, keep='none')
+        else:
+            image.webpsave(target_path, Q=quality, strip=True)
+        return True
+    except Exception as e:
+        # Includes API differences in older libvips/pyvips, not just pyvips.Error
+        logger.debug("libvips could not create thumbnail for %s, using Pillow: %s", source_path, e)
+        return False
 
 
 def create_thumbnail(
     source_path: str,
     target_path: str,
     max_size: int = THUMBNAIL_MAX_SIZE,
-    quality: int = THUMBNAIL_QUALITY
+    quality: Optional[int] = None
 ) -> bool:
-    """Create a resized WebP thumbnail from an image.
+    """Create a resized WebP or AVIF thumbnail from an image.
+    
+    The format follows target_path's extension: '.avif' saves AVIF,
+    anything else saves WebP. WebP thumbnails are made with libvips when
+    pyvips is installed, falling back to Pillow.
     
     Args:
         source_path: Path to the source image
         target_path: Path where the thumbnail should be saved
         max_size: Maximum width or height (maintains aspect ratio)
-        quality: WebP quality (0-100)
+        quality: Encoder quality (0-100); defaults to THUMBNAIL_QUALITY for
+                 WebP and AVIF_QUALITY for AVIF
     
     Returns:
         bool: True if thumbnail was created successfully
@@ -62,6 +207,12 @@ def create_thumbnail(
     try:
         from PIL import Image, ImageOps
         
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        
+        if pyvips is not None and not target_path.endswith('.avif'):
+            if _create_thumbnail_vips(source_path, target_path, max_size, quality or THUMBNAIL_QUALITY):
+                return True
+        
         with Image.open(source_path) as img:
             # Apply EXIF orientation tag (fixes rotated Samsung/iPhone photos)
             # This must be done BEFORE any other operations
@@ -102,8 +253,11 @@ def create_thumbnail(
                 # Use high-quality resampling
                 img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
-            # Save as WebP
-            img.save(target_path, 'WebP', quality=quality)
+            if target_path.endswith('.avif'):
+                img.save(target_path, 'AVIF', quality=quality or AVIF_QUALITY, speed=AVIF_SPEED)
+            else:
+                # Save as WebP
+                img.save(target_path, 'WebP', quality=quality or THUMBNAIL_QUALITY)
             return True
             
     except Exception as e:
@@ -111,6 +265,73 @@ def create_thumbnail(
             return False
 
 
+def _extract_video_poster_av(video_path: str, max_size: int):
+    """Decode a video poster in-process with PyAV (see create_video_poster()).
+    
+    Decodes the first keyframe through the libav bindings instead of
+    spawning an ffmpeg process per poster. Output matches the ffmpeg CLI
+    path: display rotation applied, scaled to max_size high with an even
+    width. Doesn't write anything, so an abandoned (timed out) call can't
+    touch the poster file.
+    
+    Returns:
+        PIL Image of the poster, or None to fall back to the ffmpeg CLI
+    """
+    from PIL import Image
+    
+    # Decoding and the Pillow resize share one handler, so a failure in
+    # either falls back to the ffmpeg CLI
+    try:
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            codec_context = stream.codec_context
+            # Only the first frame is needed: skip non-key frames and
+            # don't spin up decoder threads
+            codec_context.skip_frame = 'NONKEY'
+            codec_context.thread_count = 1
+            frame = next(container.decode(stream), None)
+            if frame is None:
+                return None
+            rotation = frame.rotation
+            img = frame.to_image()
+        
+        # Rotation is counter-clockwise degrees, the same convention as Image.rotate()
+        if rotation:
+            img = img.rotate(rotation, expand=True)
+        
+        # Same sizing as ffmpeg's scale=-2:{max_size}
+        width = max(2, round(img.width * max_size / img.height / 2) * 2)
+        return img.resize((width, max_size), Image.Resampling.LANCZOS)
+    except Exception as e:
+        logger.debug("PyAV could not extract poster from %s, using ffmpeg: %s", video_path, e)
+        return None
+
+
+def _create_video_poster_av(video_path: str, target_path: str, max_size: int, quality: int) -> bool:
+    """Write a PyAV-extracted poster, giving up after _AV_POSTER_TIMEOUT seconds.
+    
+    Returns:
+        bool: True if the poster was written, False to fall back to the ffmpeg CLI
+    """
+    future = _av_executor.submit(_extract_video_poster_av, video_path, max_size)
+    try:
+        img = future.result(timeout=_AV_POSTER_TIMEOUT)
+    except FutureTimeoutError:
+        # Drop it if still queued; a running decode is left to finish on its own
+        future.cancel()
+        logger.warning("PyAV poster extraction timed out for %s, using ffmpeg", video_path)
+        return False
+    if img is None:
+        return False
+    
+    try:
+        img.save(target_path, 'JPEG', quality=quality)
+    except Exception as e:
+        logger.debug("Could not save PyAV poster for %s, using ffmpeg: %s", video_path, e)
+        return False
+    return True
+
+
 def create_video_poster(
     video_path: str,
     target_path: str,
@@ -120,7 +341,8 @@ def create_video_poster(
     """Extract a poster frame from a video file.
     
     Creates a JPEG image from the first frame of a video for instant display
-    while the video loads in the background.
+    while the video loads in the background. Uses PyAV when installed,
+    falling back to the ffmpeg CLI.
     
     Args:
         video_path: Path to the source video file
@@ -132,37 +354,60 @@ def create_video_poster(
         bool: True if poster was created successfully
     """
     try:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        
+        # Older PyAV releases don't expose frame.rotation and would produce
+        # unrotated posters, so they use the ffmpeg CLI
+        if av is not None and hasattr(av.VideoFrame, 'rotation'):
+            if _create_video_poster_av(video_path, target_path, max_size, quality):
+                return True
+        
         # Build ffmpeg command to extract first frame
-        # -ss 00:00:00.001 seeks to 1ms (avoids potential black frames at start)
-        # -vframes 1 extracts only one frame
+        # -ss before -i seeks the input (to 1ms, avoids potential black frames at start)
+        # -frames:v 1 decodes and writes only one frame
+        # -threads 1 avoids spinning up decoder threads for a single frame
         # -vf scale ensures proper sizing
-        cmd = [
-            'ffmpeg',
-            '-ss', '00:00:00.001',
-            '-i', video_path,
-            '-vframes', '1',
+        output_args = [
+            '-frames:v', '1',
+            '-threads', '1',
             '-vf', f'scale=-2:{max_size}:flags=lanczos',
             '-q:v', str(max(1, 31 - (quality * 30 // 100))),  # Convert quality to ffmpeg q:v scale
+            '-f', 'image2',
             '-y',  # Overwrite output file
             target_path
         ]
+        input_args = ['-ss', '00:00:00.001', '-i', video_path]
         
-        # Run ffmpeg
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            timeout=10  # 10 second timeout for frame extraction
-        )
+        attempts = [[]]
+        if ffmpeg_hwaccel_available():
+            # Hardware decode first; `auto` silently uses software for codecs
+            # the device can't handle, and a failed init retries in software
+            attempts.insert(0, ['-hwaccel', 'auto'])
         
-        if result.returncode == 0 and os.path.exists(target_path):
-            return True
-        else:
-            logger.error("ffmpeg error extracting poster from %s: %s", video_path, result.stderr.decode()[:500])
-            return False
+        for hwaccel_args in attempts:
+            cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', *hwaccel_args, *input_args, *output_args]
+            decode = 'hardware' if hwaccel_args else 'software'
+            
+            # Run ffmpeg. A hung attempt (e.g. a stuck hardware decoder)
+            # times out on its own and still leaves the next one to try
+            try:
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    timeout=10  # 10 second timeout for frame extraction
+                )
+            except subprocess.TimeoutExpired:
+                logger.warning("Timeout extracting video poster (%s decode): %s", decode, video_path)
+                continue
+            
+            if result.returncode == 0 and os.path.exists(target_path):
+                return True
             
-    except subprocess.TimeoutExpired:
-        logger.warning("Timeout extracting video poster: %s", video_path)
+            logger.error("ffmpeg error extracting poster from %s (%s decode): %s",
+                         video_path, decode, result.stderr.decode()[:500])
+        
         return False
+            
     except FileNotFoundError:
         logger.warning("ffmpeg not found - video poster extraction requires ffmpeg")
         return False
@@ -171,6 +416,50 @@ def create_video_poster(
         return False
 
 
+def _generate_once(target_path: str, func: Callable[..., bool], *args) -> bool:
+    """Run a generation job on the pool, coalescing duplicate requests.
+    
+    If a job for target_path is already running, wait for it instead of
+    starting another.
+    
+    Args:
+        target_path: Output file path (identifies the job)
+        func: Generation function returning True on success
+        *args: Arguments for func
+    
+    Returns:
+        bool: Result of the (possibly shared) job
+    """
+    with _inflight_lock:
+        future = _inflight.get(target_path)
+        if future is None:
+            future = _executor.submit(func, *args)
+            _inflight[target_path] = future
+    
+    try:
+        return future.result()
+    finally:
+        with _inflight_lock:
+            if _inflight.get(target_path) is future:
+                del _inflight[target_path]
+
+
+def generate_thumbnail(source_path: str, target_path: str) -> bool:
+    """Create a thumbnail on the generation pool (see create_thumbnail()).
+    
+    Concurrent calls for the same target share a single encode.
+    """
+    return _generate_once(target_path, create_thumbnail, source_path, target_path)
+
+
+def generate_video_poster(video_path: str, target_path: str) -> bool:
+    """Extract a video poster on the generation pool (see create_video_poster()).
+    
+    Concurrent calls for the same target share a single ffmpeg run.
+    """
+    return _generate_once(target_path, create_video_poster, video_path, target_path)
+
+
 def get_cache_key(file_path: str, optimization_type: str) -> str:
     """Generate a cache key for an optimized file.
     
@@ -181,6 +470,14 @@ def get_cache_key(file_path: str, optimization_type: str) -> str:
     Returns:
         A unique cache key string
     """
-    mtime = os.path.getmtime(file_path)
-    size = os.path.getsize(file_path)
-    return hashlib.md5(f"{file_path}_{mtime}_{size}_{optimization_type}".encode()).hexdigest()
+    st = os.stat(file_path)
+    return _cache_key_digest(file_path, st.st_mtime, st.st_size, optimization_type)
+
+
+@lru_cache(maxsize=_KEY_CACHE_SIZE)
+def _cache_key_digest(file_path: str, file_mtime: float, file_size: int, optimization_type: str) -> str:
+    """Hash a cache key (see get_cache_key()). Memoized: the inputs fully determine it."""
+    return hashlib.blake2b(
+        f"{file_path}_{file_mtime}_{file_size}_{optimization_type}".encode(),
+        digest_size=16
+    ).hexdigest()
@@ -4,7 +4,9 @@ Handles path validation, normalization, and security checks.
 """
 
 import os
-from typing import Optional, Tuple, Dict, Any
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Optional, Tuple, Dict, Any, FrozenSet, Iterable, Iterator, Mapping
 from urllib.parse import quote, unquote
 
 from app.config import (
@@ -16,21 +18,36 @@ from app.config import (
 )
 
 
-def _load_config() -> Dict[str, Any]:
-    """Load configuration - imported here to avoid circular imports."""
-    from app.services.data import load_config
-    return load_config()
+# URL prefixes for the image-serving endpoints
+IMAGE_URL_PREFIX = '/image?path='
+THUMBNAIL_URL_PREFIX = '/thumbnail?path='
 
+# Sorted allowed-folder prefixes, rebuilt when the cached folder set changes
+_allowed_prefixes_cache: Dict[str, Any] = {
+    'source': None,
+    'prefixes': (),
+}
 
-def _get_optimization_settings() -> Dict[str, bool]:
-    """Get optimization settings - imported here to avoid circular imports."""
-    from app.services.data import get_optimization_settings
-    return get_optimization_settings()
 
+def _get_folder_set() -> FrozenSet[str]:
+    """Get configured folders - imported here to avoid circular imports."""
+    from app.services.data import get_folder_set
+    return get_folder_set()
 
+
+def _get_optimization_settings() -> Mapping[str, Any]:
+    """Get optimization settings (read-only) - imported here to avoid circular imports."""
+    from app.services.data import get_optimization_settings_view
+    return get_optimization_settings_view()
+
+
+@lru_cache(maxsize=256)
 def expand_path(path_str: str) -> str:
     """Expand ~ to home directory and normalize path.
     
+    Memoized since the same configured folder strings are expanded on
+    every request.
+    
     Args:
         path_str: The path string to expand
         
@@ -52,6 +69,63 @@ def normalize_path(path_str: str) -> str:
     return os.path.normpath(expand_path(path_str))
 
 
+def get_extension(path: str) -> str:
+    """Get a path's lowercased file extension (e.g. '.jpg').
+    
+    Same result as Path(path).suffix.lower() without constructing a Path
+    object, for extension checks on every media request.
+    
+    Args:
+        path: File path
+        
+    Returns:
+        The extension including the dot, or '' if there is none
+    """
+    dot = path.rfind('.')
+    # No dot in the final component, a leading-dot name ('.hidden'), or a trailing dot
+    if dot <= max(path.rfind('/'), path.rfind(os.sep)) + 1 or dot == len(path) - 1:
+        return ''
+    return path[dot:].lower()
+
+
+def _with_trailing_sep(path: str) -> str:
+    """Append a path separator unless path already ends with one (e.g. /)."""
+    return path if path.endswith(os.sep) else path + os.sep
+
+
+def _get_allowed_prefixes() -> Tuple[str, ...]:
+    """Get the normalized allowed folders as sorted, separator-terminated prefixes.
+    
+    The trailing separator keeps a folder from matching siblings that share
+    its name as a prefix (/photos must not allow /photos-private). Folders
+    nested inside another allowed folder are dropped, so no prefix starts
+    with another one. A path is then allowed exactly when it starts with the
+    greatest prefix that sorts at or before it.
+    """
+    folders = _get_folder_set()
+    if _allowed_prefixes_cache['source'] is not folders:
+        prefixes = []
+        for folder in sorted({_with_trailing_sep(normalize_path(folder)) for folder in folders}):
+            if not prefixes or not folder.startswith(prefixes[-1]):
+                prefixes.append(folder)
+        _allowed_prefixes_cache['prefixes'] = tuple(prefixes)
+        _allowed_prefixes_cache['source'] = folders
+    return _allowed_prefixes_cache['prefixes']
+
+
+@lru_cache(maxsize=8192)
+def _path_has_prefix(path_to_check: str, prefixes: Tuple[str, ...]) -> bool:
+    """Check path_to_check against sorted prefixes (see _get_allowed_prefixes()).
+    
+    The path gets a trailing separator too, so an allowed folder itself
+    matches its own prefix. Memoized per (path, prefixes): a config change
+    yields a new prefixes tuple, so stale results are never reused.
+    """
+    path_to_check = _with_trailing_sep(path_to_check)
+    i = bisect_right(prefixes, path_to_check)
+    return i > 0 and path_to_check.startswith(prefixes[i - 1])
+
+
 def is_path_allowed(path_to_check: str) -> bool:
     """Check if a path is within the configured allowed folders.
     
@@ -61,12 +135,7 @@ def is_path_allowed(path_to_check: str) -> bool:
     Returns:
         bool: True if path is within an allowed folder
     """
-    config = _load_config()
-    for folder in config.get('folders', []):
-        folder_normalized = normalize_path(folder)
-        if path_to_check.startswith(folder_normalized):
-            return True
-    return False
+    return _path_has_prefix(path_to_check, _get_allowed_prefixes())
 
 
 def validate_and_normalize_path(request_path: Optional[str]) -> Tuple[Optional[str], Optional[Tuple[Dict[str, str], int]]]:
@@ -94,11 +163,25 @@ def validate_and_normalize_path(request_path: Optional[str]) -> Tuple[Optional[s
     return normalized, None
 
 
+def get_image_url_prefix() -> str:
+    """Get the URL prefix for serving images under current settings.
+    
+    Returns:
+        THUMBNAIL_URL_PREFIX when thumbnail optimization is enabled,
+        otherwise IMAGE_URL_PREFIX
+    """
+    optimizations = _get_optimization_settings()
+    if optimizations.get('thumbnail_cache', False):
+        return THUMBNAIL_URL_PREFIX
+    return IMAGE_URL_PREFIX
+
+
 def format_image_url(image_path: str) -> str:
     """Format an image path as a URL-encoded URL.
     
     Uses /thumbnail endpoint for optimized display performance when enabled.
     Falls back to /image when optimization is disabled.
+    For many paths, prefer format_image_urls() which resolves settings once.
     
     Args:
         image_path: The full path to the image file
@@ -106,17 +189,57 @@ def format_image_url(image_path: str) -> str:
     Returns:
         A URL string for the image
     """
-    optimizations = _get_optimization_settings()
-    if optimizations.get('thumbnail_cache', False):
-        return f'/thumbnail?path={quote(image_path, safe="")}'
-    else:
-        return f'/image?path={quote(image_path, safe="")}'
+    return get_image_url_prefix() + quote(image_path, safe='')
+
+
+def format_image_urls(image_paths: Iterable[str], prefix: Optional[str] = None) -> Iterator[str]:
+    """Format many image paths as URL-encoded URLs.
+    
+    Settings are read once for the whole batch rather than once per path.
+    Returns a lazy iterator; wrap in list() when a list is needed.
+    
+    Args:
+        image_paths: Full paths to the image files
+        prefix: URL prefix to use (defaults to get_image_url_prefix())
+        
+    Returns:
+        Iterator of URL strings, in input order
+    """
+    if prefix is None:
+        prefix = get_image_url_prefix()
+    _quote = quote
+    return (prefix + _quote(image_path, safe='') for image_path in image_paths)
+
+
+def format_versioned_image_urls(
+    entries: Iterable[Tuple[str, float]],
+    prefix: Optional[str] = None
+) -> Iterator[str]:
+    """Format (path, mtime) pairs as URLs carrying a version parameter.
+    
+    Appends &v=<mtime in whole seconds>, the same value thumbnails are keyed
+    on, so serve_thumbnail() can answer revalidation of a versioned URL with
+    a 304 before any stat. A modified file gets a new URL once the listing
+    is rebuilt. Returns a lazy iterator, like format_image_urls().
+    
+    Args:
+        entries: (full path, modification time) pairs
+        prefix: URL prefix to use (defaults to get_image_url_prefix())
+    
+    Returns:
+        Iterator of URL strings, in input order
+    """
+    if prefix is None:
+        prefix = get_image_url_prefix()
+    _quote = quote
+    return (f'{prefix}{_quote(image_path, safe="")}&v={int(mtime)}' for image_path, mtime in entries)
 
 
 def extract_path_from_url(url_path: str) -> str:
     """Extract the actual file path from a URL format.
     
-    Handles both /thumbnail?path= and /image?path= prefixes.
+    Handles both /thumbnail?path= and /image?path= prefixes, dropping
+    trailing URL parameters such as the &v= version.
     
     Args:
         url_path: The URL path (e.g., '/image?path=/Users/...')
@@ -125,8 +248,12 @@ def extract_path_from_url(url_path: str) -> str:
         The decoded file path
     """
     path = url_path
-    if path.startswith('/thumbnail?path='):
-        path = path.replace('/thumbnail?path=', '', 1)
-    elif path.startswith('/image?path='):
-        path = path.replace('/image?path=', '', 1)
-    return unquote(path)
+    if path.startswith(THUMBNAIL_URL_PREFIX):
+        path = path[len(THUMBNAIL_URL_PREFIX):]
+    elif path.startswith(IMAGE_URL_PREFIX):
+        path = path[len(IMAGE_URL_PREFIX):]
+    else:
+        # Plain path: a literal '&' is part of the file name
+        return unquote(path)
+    # In a URL the path value is percent-encoded, so the first '&' ends it
+    return unquote(path.partition('&')[0])
@@ -7,7 +7,7 @@
 import { state, BATCH_SIZE, IMAGE_POOL_BUFFER, getPreloadCount, isAnyModalOpen } from './state.js';
 
 // Import utilities
-import { extractPath, isGifUrl, isVideoUrl, isConvertedGifUrl, normalizePath } from './utils/path.js';
+import { extractPath, extractVersion, isGifUrl, isVideoUrl, isConvertedGifUrl, normalizePath } from './utils/path.js';
 import { addVideoControls } from './utils/video.js';
 
 // Import viewport manager (replaces state.observer + state.gifObserver)
@@ -274,6 +274,7 @@ function setupEventListeners() {
     
     // Cache optimization toggles - set up once during initialization
     const thumbnailToggle = document.getElementById('toggleThumbnailCache');
+    const avifToggle = document.getElementById('toggleAvifThumbnails');
     const videoPosterToggle = document.getElementById('toggleVideoPoster');
     
     if (thumbnailToggle) {
@@ -291,6 +292,17 @@ function setupEventListeners() {
             }
         });
     }
+    if (avifToggle) {
+        avifToggle.addEventListener('change', async (e) => {
+            try {
+                await API.updateSettings({ optimizations: { avif_thumbnails: e.target.checked } });
+                state.optimizations.avif_thumbnails = e.target.checked;
+                console.log('AVIF thumbnail setting saved:', e.target.checked);
+            } catch (error) {
+                console.error('Failed to save AVIF thumbnail setting:', error);
+            }
+        });
+    }
     if (videoPosterToggle) {
         videoPosterToggle.addEventListener('change', async (e) => {
             try {
@@ -735,9 +747,12 @@ function loadStaticImageForSlide(slide, src, isPriorityImage = false, isPreload
     
     // Use thumbnail endpoint if thumbnail caching is enabled
     if (state.optimizations.thumbnail_cache) {
-        // Convert /image?path= to /thumbnail?path=
+        // Convert /image?path= to /thumbnail?path= (keeping any &v= version,
+        // which lets the server answer revalidation without a disk stat)
         const path = extractPath(src);
-        const thumbnailUrl = `/thumbnail?path=${encodeURIComponent(path)}`;
+        const version = extractVersion(src);
+        const thumbnailUrl = `/thumbnail?path=${encodeURIComponent(path)}` +
+            (version ? `&v=${encodeURIComponent(version)}` : '');
         console.log(`[Thumbnail] Loading: ${thumbnailUrl.substring(0, 100)}...`);
         img.src = thumbnailUrl;
     } else {
@@ -2023,6 +2038,7 @@ async function loadSettingsModalData() {
         }
         
         const thumbnailToggle = document.getElementById('toggleThumbnailCache');
+        const avifToggle = document.getElementById('toggleAvifThumbnails');
         const videoPosterToggle = document.getElementById('toggleVideoPoster');
         const fillScreenToggle = document.getElementById('toggleFillScreen');
         const autoAdvanceToggle = document.getElementById('toggleAutoAdvance');
@@ -2032,6 +2048,7 @@ async function loadSettingsModalData() {
         const preloadDistanceValue = document.getElementById('preloadDistanceValue');
         
         if (thumbnailToggle) thumbnailToggle.checked = settings.optimizations?.thumbnail_cache || false;
+        if (avifToggle) avifToggle.checked = settings.optimizations?.avif_thumbnails || false;
         if (videoPosterToggle) videoPosterToggle.checked = settings.optimizations?.video_poster_cache || false;
         if (fillScreenToggle) fillScreenToggle.checked = settings.optimizations?.fill_screen || false;
         if (autoAdvanceToggle) autoAdvanceToggle.checked = settings.optimizations?.auto_advance || false;
@@ -38,6 +38,7 @@ export const state = {
     // Optimization settings (loaded from server)
     optimizations: {
         thumbnail_cache: false,
+        avif_thumbnails: false,
         video_poster_cache: false,
         fill_screen: false,
         auto_advance: false,
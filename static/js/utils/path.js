@@ -3,6 +3,29 @@
  * Handles URL parsing and path manipulation.
  */
 
+/**
+ * Drop query parameters that follow the path in an image URL (e.g. &v=<mtime>)
+ * The path value itself is URL-encoded, so the first '&' ends it
+ * 
+ * @param {string} url - The image URL
+ * @returns {string} The URL without trailing parameters
+ */
+function stripExtraParams(url) {
+    const ampIndex = url.indexOf('&');
+    return ampIndex === -1 ? url : url.substring(0, ampIndex);
+}
+
+/**
+ * Get the version (v parameter) from an image URL, if present
+ * 
+ * @param {string} imageUrl - The image URL
+ * @returns {string|null} The version string, or null
+ */
+export function extractVersion(imageUrl) {
+    const match = /[?&]v=([^&]*)/.exec(imageUrl);
+    return match ? decodeURIComponent(match[1]) : null;
+}
+
 /**
  * Extract the actual file path from an image URL
  * Handles both /thumbnail?path= and /image?path= prefixes and URL decoding
@@ -11,7 +34,7 @@
  * @returns {string} The decoded file path
  */
 export function extractPath(imageUrl) {
-    let path = imageUrl;
+    let path = stripExtraParams(imageUrl);
     // Handle both thumbnail and image URL formats
     if (path.startsWith('/thumbnail?path=')) {
         path = path.replace('/thumbnail?path=', '');
@@ -69,7 +92,7 @@ export function normalizePath(path) {
 export function isGifUrl(url) {
     try {
         // Decode the URL and check the extension
-        const decodedUrl = decodeURIComponent(url);
+        const decodedUrl = decodeURIComponent(stripExtraParams(url));
         return decodedUrl.toLowerCase().endsWith('.gif');
     } catch {
         return false;
@@ -84,7 +107,7 @@ export function isGifUrl(url) {
  */
 export function isVideoUrl(url) {
     try {
-        const decodedUrl = decodeURIComponent(url);
+        const decodedUrl = decodeURIComponent(stripExtraParams(url));
         const lower = decodedUrl.toLowerCase();
         // Note: .webm is included because GIFs are converted to WebM
         return lower.endsWith('.m4v') || lower.endsWith('.mp4') || lower.endsWith('.webm') || lower.endsWith('.mov');
@@ -106,6 +129,7 @@ export function isConvertedGifUrl(url) {
 // Default export with all utilities
 export default {
     extractPath,
+    extractVersion,
     extractFolderPath,
     extractFilename,
     normalizePath,